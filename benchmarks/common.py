@@ -0,0 +1,40 @@
+"""Setup shared by the benchmarks.
+
+Benchmarks importing the bot's modules, which load its config on import, need the same
+environment (`.env`) as the bot.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from tortoise import Tortoise
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+@contextlib.asynccontextmanager
+async def benchmark_db(db_uri: str | None = None) -> AsyncIterator[None]:
+    """Connect Tortoise to `db_uri` with the bot's schema, or to a temporary SQLite file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        await Tortoise.init(
+            {
+                "connections": {"default": db_uri or f"sqlite://{Path(tmp) / 'bench.db'}"},
+                "apps": {
+                    "embed_fixer": {
+                        "models": ["embed_fixer.models"],
+                        "default_connection": "default",
+                    }
+                },
+            }
+        )
+        await Tortoise.generate_schemas()
+
+        try:
+            yield
+        finally:
+            await Tortoise.close_connections()
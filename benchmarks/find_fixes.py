@@ -0,0 +1,110 @@
+"""Measure `_find_fixes` latency on multi-link messages with and without concurrency.
+
+Media extraction is simulated with `--latency` per link, so nothing touches Discord, the
+database or the network. Messages are processed with one URL at a time and with
+`FIND_FIXES_CONCURRENCY`, and both must produce the same result.
+
+Usage: `uv run python -m benchmarks.find_fixes [--links N] [--messages N] [--latency MS]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import types
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from embed_fixer.cogs.fixer import (
+    FIND_FIXES_CONCURRENCY,
+    FixerCog,
+    Media,
+    MockMessage,
+    PostExtractionResult,
+)
+
+if TYPE_CHECKING:
+    from embed_fixer.fixes import DomainId
+
+URLS = (
+    "https://pixiv.net/artworks/{}",
+    "https://x.com/user/status/{}",
+    "https://bsky.app/profile/user.bsky.social/post/{}",
+)
+
+
+class SimulatedFixerCog(FixerCog):
+    def __init__(self, latency: float) -> None:
+        super().__init__(types.SimpleNamespace(session=None))  # pyright: ignore[reportArgumentType]
+        self.latency = latency
+
+    async def _extract_post_info(
+        self,
+        domain_id: DomainId,
+        url: str,
+        *,
+        spoiler: bool = False,  # noqa: ARG002
+        filesize_limit: int,  # noqa: ARG002
+    ) -> PostExtractionResult:
+        await asyncio.sleep(self.latency)
+        return PostExtractionResult(
+            medias=[Media(url=f"{url}/media.png")], content=url, author_md=domain_id.name
+        )
+
+
+async def measure(name: str, cog: FixerCog, messages: list[str], *, concurrency: int) -> list[Any]:
+    results: list[Any] = []
+    latencies: list[float] = []
+
+    for content in messages:
+        message = MockMessage(
+            content=content,
+            channel=types.SimpleNamespace(id=1),  # pyright: ignore[reportArgumentType]
+            guild=None,
+            author=types.SimpleNamespace(id=1),  # pyright: ignore[reportArgumentType]
+        )
+        start = time.perf_counter()
+        result = await cog._find_fixes(
+            message,
+            settings=None,
+            filesize_limit=0,
+            extract_media=True,
+            is_ctx_menu=True,
+            concurrency=concurrency,
+        )
+        latencies.append(time.perf_counter() - start)
+        results.append((message.content, result.model_dump(exclude={"medias"}), result.medias))
+
+    print(
+        f"{name:<12} mean {statistics.fmean(latencies) * 1e3:>8.1f} ms "
+        f"max {max(latencies) * 1e3:>8.1f} ms"
+    )
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=4, help="Links per message")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=100, help="Extraction latency in ms")
+    args = parser.parse_args()
+    logger.disable("embed_fixer")
+
+    messages = [
+        " ".join(URLS[i % len(URLS)].format(m * args.links + i) for i in range(args.links))
+        for m in range(args.messages)
+    ]
+    cog = SimulatedFixerCog(args.latency / 1e3)
+
+    sequential = await measure("sequential", cog, messages, concurrency=1)
+    concurrent = await measure("concurrent", cog, messages, concurrency=FIND_FIXES_CONCURRENCY)
+    if sequential != concurrent:
+        msg = "Concurrent results differ from sequential ones"
+        raise AssertionError(msg)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
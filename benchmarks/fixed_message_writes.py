@@ -0,0 +1,78 @@
+"""Compare inline `FixedMessage` inserts with the write-behind queue under bursty traffic.
+
+Each burst simulates `--burst` fixes finishing at the same time, as in a busy channel. The
+latency column is the time a fix spends recording its message, which is on the path to the
+delete reaction being added.
+
+Usage: `uv run python -m benchmarks.fixed_message_writes [--bursts N] [--burst N] [--db-uri URI]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from typing import TYPE_CHECKING
+
+from benchmarks.common import benchmark_db
+from embed_fixer.models import FixedMessage
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+_ids = itertools.count(1)
+
+
+async def inline_fix() -> float:
+    start = time.perf_counter()
+    await FixedMessage.create(
+        id=next(_ids), guild_id=1, channel_id=1, author_id=1, send_type="webhook"
+    )
+    return time.perf_counter() - start
+
+
+async def write_behind_fix() -> float:  # noqa: RUF029
+    start = time.perf_counter()
+    FixedMessage.add(id=next(_ids), guild_id=1, channel_id=1, author_id=1, send_type="webhook")
+    return time.perf_counter() - start
+
+
+async def measure(
+    name: str, fix: Callable[[], Awaitable[float]], *, bursts: int, burst: int
+) -> None:
+    latencies: list[float] = []
+
+    start = time.perf_counter()
+    for _ in range(bursts):
+        latencies.extend(await asyncio.gather(*(fix() for _ in range(burst))))
+        # Let background flushes run between bursts, as the event loop would
+        await asyncio.sleep(0)
+    await FixedMessage.flush()
+    elapsed = time.perf_counter() - start
+
+    total = bursts * burst
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    print(
+        f"{name:<12} {total / elapsed:>10.0f} rows/s "
+        f"mean {statistics.fmean(latencies) * 1e3:>8.3f} ms p99 {p99 * 1e3:>8.3f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bursts", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--db-uri", help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    async with benchmark_db(args.db_uri):
+        await FixedMessage.load()
+        for name, fix in (("inline", inline_fix), ("write-behind", write_behind_fix)):
+            await FixedMessage.all().delete()
+            await measure(name, fix, bursts=args.bursts, burst=args.burst)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Compare sequential and speculative Pixiv fetches against a local stub Pixiv server.
+
+The stub serves the artwork info, pages and ugoira meta endpoints with `--latency` added
+to each response, and every `--ugoira-every`th artwork is an ugoira. Both modes must
+return the same artworks.
+
+Usage: `uv run python -m benchmarks.pixiv_fetch [--artworks N] [--latency MS] [--ugoira-every N]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+from embed_fixer.utils import fetch_info
+from embed_fixer.utils.fetch_info import PixivArtwork, PostInfoFetcher
+
+HOST = "127.0.0.1"
+
+
+def make_app(latency: float, ugoira_every: int) -> web.Application:
+    requests = {"count": 0}
+
+    async def delay() -> None:
+        requests["count"] += 1
+        await asyncio.sleep(latency)
+
+    async def illust(request: web.Request) -> web.Response:
+        await delay()
+        artwork_id = int(request.match_info["id"])
+        return web.json_response(
+            {
+                "body": {
+                    "illustId": artwork_id,
+                    "illustType": 2 if artwork_id % ugoira_every == 0 else 0,
+                    "title": "title",
+                    "description": "description",
+                    "tags": {"tags": [{"tag": "tag"}]},
+                    "userName": "artist",
+                    "userId": "1",
+                    "createDate": "2024-01-01T00:00:00+09:00",
+                }
+            }
+        )
+
+    async def pages(request: web.Request) -> web.Response:
+        await delay()
+        artwork_id = request.match_info["id"]
+        return web.json_response(
+            {
+                "body": [
+                    {"urls": {"original": f"https://i.pximg.net/{artwork_id}_p{i}.png"}}
+                    for i in range(3)
+                ]
+            }
+        )
+
+    async def ugoira_meta(request: web.Request) -> web.Response:
+        await delay()
+        artwork_id = request.match_info["id"]
+        return web.json_response(
+            {
+                "body": {
+                    "src": f"https://i.pximg.net/{artwork_id}_600x600.zip",
+                    "originalSrc": f"https://i.pximg.net/{artwork_id}.zip",
+                    "mime_type": "image/jpeg",
+                    "frames": [{"file": "000000.jpg", "delay": 100}],
+                }
+            }
+        )
+
+    app = web.Application()
+    app["requests"] = requests
+    app.router.add_get("/ajax/illust/{id}", illust)
+    app.router.add_get("/ajax/illust/{id}/pages", pages)
+    app.router.add_get("/ajax/illust/{id}/ugoira_meta", ugoira_meta)
+    return app
+
+
+async def measure(
+    name: str, fetcher: PostInfoFetcher, artwork_ids: list[int], requests: dict[str, int]
+) -> list[PixivArtwork | None]:
+    requests["count"] = 0
+    artworks: list[PixivArtwork | None] = []
+    latencies: list[float] = []
+
+    for artwork_id in artwork_ids:
+        start = time.perf_counter()
+        # Bypass the post caches, which would answer every fetch after the first run
+        artworks.append(await fetcher._fetch_pixiv(str(artwork_id)))
+        latencies.append(time.perf_counter() - start)
+
+    print(
+        f"{name:<12} mean {statistics.fmean(latencies) * 1e3:>8.1f} ms "
+        f"max {max(latencies) * 1e3:>8.1f} ms {requests['count']:>6} requests"
+    )
+    return artworks
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artworks", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=50, help="Server latency in ms")
+    parser.add_argument("--ugoira-every", type=int, default=10)
+    args = parser.parse_args()
+    logger.disable("embed_fixer")
+
+    app = make_app(args.latency / 1e3, args.ugoira_every)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, 0).start()
+    fetch_info.PIXIV_AJAX_URL = f"http://{HOST}:{runner.addresses[0][1]}/ajax/illust"
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            artwork_ids = list(range(1, args.artworks + 1))
+            sequential = await measure(
+                "sequential",
+                PostInfoFetcher(session, speculative_pixiv_pages=False),
+                artwork_ids,
+                app["requests"],
+            )
+            speculative = await measure(
+                "speculative", PostInfoFetcher(session), artwork_ids, app["requests"]
+            )
+    finally:
+        await runner.cleanup()
+
+    if sequential != speculative:
+        msg = "Speculative artworks differ from sequential ones"
+        raise AssertionError(msg)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
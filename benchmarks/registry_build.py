@@ -0,0 +1,71 @@
+"""Measure the import cost of `embed_fixer.fixes` and the time to build its `DomainRegistry`.
+
+The import is timed in fresh interpreters. The registry is also built from copies of
+`DOMAINS` repeated `--scale` times, to check that it stays cheap as domains are added.
+
+Usage: `uv run python -m benchmarks.registry_build [--runs N] [--scale N]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+
+from embed_fixer.fixes import DOMAINS, Domain, DomainRegistry
+
+IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import embed_fixer.fixes; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def copy_domains(scale: int) -> list[Domain]:
+    """Return `scale` copies of `DOMAINS` with unique IDs and no cached lookups."""
+    offset = max(d.id for d in DOMAINS)
+    return [
+        dataclasses.replace(
+            domain,
+            id=domain.id + offset * i,
+            websites=[dataclasses.replace(website) for website in domain.websites],
+        )
+        for i in range(scale)
+        for domain in DOMAINS
+    ]
+
+
+def measure_import(runs: int) -> float:
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], text=True))  # noqa: S603
+        for _ in range(runs)
+    ]
+    return statistics.median(timings)
+
+
+def measure_build(runs: int, scale: int) -> float:
+    timings: list[float] = []
+    for _ in range(runs):
+        domains = copy_domains(scale)
+        start = time.perf_counter()
+        DomainRegistry.build(domains)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'import':<16} {measure_import(args.runs) * 1e3:>8.2f} ms")
+    for scale in (1, args.scale):
+        elapsed = measure_build(args.runs, scale)
+        print(f"{f'build {len(DOMAINS) * scale} domains':<16} {elapsed * 1e3:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
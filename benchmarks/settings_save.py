@@ -0,0 +1,67 @@
+"""Compare the legacy get_or_create + save path of `BaseSettings.save` with the upsert path.
+
+Usage: `uv run python -m benchmarks.settings_save [--iterations N] [--db-uri URI]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from benchmarks.common import benchmark_db
+from embed_fixer.models import GuildSettings, GuildSettingsTable
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+async def legacy_save(settings: GuildSettings) -> None:
+    obj, _ = await GuildSettingsTable.get_or_create(id=settings.id)
+    obj.data = settings.model_dump(mode="json", exclude={"id"})
+    await obj.save()
+
+
+async def upsert_save(settings: GuildSettings) -> None:
+    await settings.save()
+
+
+async def upsert_partial_save(settings: GuildSettings) -> None:
+    await settings.save(update_fields=("lang",))
+
+
+async def measure(
+    name: str, save: Callable[[GuildSettings], Awaitable[None]], *, iterations: int, guilds: int
+) -> None:
+    settings = [GuildSettings(id=guild_id, lang="en_US") for guild_id in range(guilds)]
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        await save(settings[i % guilds])
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:<16} {iterations / elapsed:>10.0f} saves/s {elapsed / iterations * 1e6:>10.1f} us/save"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--db-uri", help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    async with benchmark_db(args.db_uri):
+        for name, save in (
+            ("legacy", legacy_save),
+            ("upsert", upsert_save),
+            ("upsert partial", upsert_partial_save),
+        ):
+            await GuildSettingsTable.all().delete()
+            await measure(name, save, iterations=args.iterations, guilds=args.guilds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
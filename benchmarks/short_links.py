@@ -0,0 +1,96 @@
+"""Resolve short links against a local aiohttp server that redirects like a share link.
+
+Every short link redirects twice before reaching the post, with `--latency` added to each
+response. Timings are printed for cold and warm resolutions, and for bursts of
+concurrent resolutions of the same link, which should only reach the server once.
+
+Usage: `uv run python -m benchmarks.short_links [--links N] [--burst N] [--latency MS]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+from embed_fixer.utils.short_links import ShortLinkResolver
+
+HOST = "127.0.0.1"
+
+
+def make_app(latency: float) -> web.Application:
+    async def share(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        location = f"/t/{request.match_info['slug']}"
+        raise web.HTTPFound(location)
+
+    async def redirect(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        location = f"/@user/video/{request.match_info['slug']}"
+        raise web.HTTPMovedPermanently(location)
+
+    async def post(_: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.Response(text="post")
+
+    app = web.Application()
+    app.router.add_get("/share/{slug}", share)
+    app.router.add_get("/t/{slug}", redirect)
+    app.router.add_get("/@user/video/{slug}", post)
+    return app
+
+
+async def measure(name: str, resolver: ShortLinkResolver, urls: list[str], base: str) -> None:
+    requests = resolver.requests
+    start = time.perf_counter()
+    resolved = await asyncio.gather(*(resolver.resolve(url) for url in urls))
+    elapsed = time.perf_counter() - start
+
+    for url, result in zip(urls, resolved, strict=True):
+        expected = f"{base}/@user/video/{url.rsplit('/', 1)[-1]}"
+        if result != expected:
+            msg = f"Resolved {url} to {result}, expected {expected}"
+            raise AssertionError(msg)
+
+    print(
+        f"{name:<8} {len(urls):>6} links {elapsed * 1e3:>9.1f} ms "
+        f"{resolver.requests - requests:>6} requests"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--burst", type=int, default=50, help="Concurrent resolutions per link")
+    parser.add_argument("--latency", type=float, default=20, help="Server latency in ms")
+    args = parser.parse_args()
+    logger.disable("embed_fixer")
+
+    runner = web.AppRunner(make_app(args.latency / 1e3))
+    await runner.setup()
+    site = web.TCPSite(runner, HOST, 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    base = f"http://{HOST}:{port}"
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            resolver = ShortLinkResolver(session)
+            urls = [f"{base}/share/{i}" for i in range(args.links)]
+
+            await measure("cold", resolver, urls, base)
+            await measure("warm", resolver, urls, base)
+
+            burst_urls = [f"{base}/share/burst{i}" for i in range(args.links)]
+            await measure("burst", resolver, burst_urls * args.burst, base)
+            print(f"coalesced {resolver.coalesced} resolutions, {resolver.info()}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Compare the three-pass URL extraction and `str.replace` rewriting with URL spans.
+
+Each message is extracted and every URL is rewritten, the way `_find_fixes` fixes a
+message.
+
+Usage: `uv run python -m benchmarks.url_extraction [--links N] [--messages N]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import TYPE_CHECKING
+
+from embed_fixer.utils.misc import iter_url_spans, replace_spans
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+SPOILER_PATTERN = r"\|\|(https?://[^\s|]+)\|\|"
+REGULAR_PATTERN = r"(?<!\$)(?<!<)(https?://[^\s>]+)(?!>)"
+
+WORDS = ("look", "at", "this", "lol", "same", "artist", "again", "wow", "nice", "ok")
+URLS = (
+    "https://x.com/user/status/{}",
+    "https://pixiv.net/artworks/{}",
+    "https://reddit.com/r/python/comments/{}/title/",
+    "https://github.com/seriaati/embed-fixer/issues/{}",
+)
+
+
+def legacy_rewrite(text: str) -> str:
+    spoiler_urls = [(match, True) for match in re.findall(SPOILER_PATTERN, text)]
+    text_without_spoilers = re.sub(SPOILER_PATTERN, "", text)
+    regular_urls = [(match, False) for match in re.findall(REGULAR_PATTERN, text_without_spoilers)]
+
+    for url, _ in spoiler_urls + regular_urls:
+        text = text.replace(url, url.replace("https://", "https://fixed."))
+    return text
+
+
+def span_rewrite(text: str) -> str:
+    return replace_spans(
+        text,
+        [
+            (span.start, span.end, span.url.replace("https://", "https://fixed."))
+            for span in iter_url_spans(text)
+            if not span.suppressed
+        ],
+    )
+
+
+def make_message(rng: random.Random, links: int) -> str:
+    parts: list[str] = []
+    for _ in range(links):
+        parts.extend(rng.choices(WORDS, k=rng.randint(1, 8)))
+        url = rng.choice(URLS).format(rng.randint(1, 10**9))
+        parts.append(f"||{url}||" if rng.random() < 0.2 else url)
+    return " ".join(parts)
+
+
+def measure(name: str, rewrite: Callable[[str], str], messages: list[str]) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        rewrite(message)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<8} {len(messages) / elapsed:>10.0f} msgs/s {elapsed / len(messages) * 1e6:>9.1f} us/msg"
+    )
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=50, help="Links per message")
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    messages = [make_message(rng, args.links) for _ in range(args.messages)]
+
+    legacy = measure("legacy", legacy_rewrite, messages)
+    spans = measure("spans", span_rewrite, messages)
+    print(f"speedup  {legacy / spans:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare the linear `DOMAINS` scan with the host index used by `WebsiteMatcher`.
+
+The corpus mixes a URL for every website with links that match nothing, and both
+approaches must agree on every URL before timings are printed. The second pair of
+timings is for a guild that only enabled a couple of domains.
+
+Usage: `uv run python -m benchmarks.url_matching [--size N]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import itertools
+import re
+import time
+from typing import TYPE_CHECKING
+
+from embed_fixer.fixes import DOMAINS, REGISTRY, DomainId, get_website_matcher
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from embed_fixer.fixes import Domain, Website
+
+SAMPLE_URLS = (
+    "https://x.com/user/status/1234567890",
+    "https://twitter.com/user_name/status/1234567890/photo/1",
+    "https://pixiv.net/en/artworks/123456",
+    "https://tiktok.com/@user.name/video/1234567890",
+    "https://vm.tiktok.com/ZMabcdef/",
+    "https://vt.tiktok.com/ZSabcdef/",
+    "https://reddit.com/r/python/comments/abc123/some_title/",
+    "https://old.reddit.com/r/python/s/AbCdEf",
+    "https://reddit.com/user/someone/comments/abc123/title",
+    "https://instagram.com/p/AbCdEf123/",
+    "https://instagram.com/share/reel/AbCdEf123",
+    "https://furaffinity.net/view/12345678/",
+    "https://clips.twitch.tv/SomeClipSlug",
+    "https://twitch.tv/streamer/clip/SomeClipSlug",
+    "https://iwara.tv/video/abc123/title",
+    "https://bsky.app/profile/user.bsky.social/post/3kabc123",
+    "https://kemono.su/patreon/user/12345/post/67890",
+    "https://facebook.com/share/r/AbCdEf/",
+    "https://facebook.com/reel/1234567890",
+    "https://m.bilibili.com/video/BV1xx411c7mD",
+    "https://b23.tv/AbCdEf",
+    "https://t.bilibili.com/1234567890",
+    "https://bilibili.com/opus/1234567890",
+    "https://tumblr.com/someblog/123456789/post-title",
+    "https://threads.net/@user.name/post/AbCdEf",
+    "https://ptt.cc/bbs/Gossiping/M.1700000000.A.ABC.html",
+    "https://deviantart.com/artist/art/Title-123456789",
+    "https://pinterest.com/pin/1234567890/",
+    "https://youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://github.com/seriaati/embed-fixer",
+    "https://discord.com/channels/1/2/3",
+    "https://google.com/search?q=embed",
+    "https://en.wikipedia.org/wiki/Discord",
+    "https://x.com/user",
+    "https://reddit.com/r/python",
+)
+
+
+GUILD_ENABLED_DOMAINS: list[int] = [DomainId.TWITTER, DomainId.PIXIV]
+
+
+def linear_scan(
+    url: str, enabled_domains: list[int] | None = None
+) -> tuple[Domain, Website] | None:
+    for domain in DOMAINS:
+        if enabled_domains is not None and domain.id not in enabled_domains:
+            continue
+        for website in domain.websites:
+            if re.match(website.pattern, url) is not None:
+                return domain, website
+    return None
+
+
+def measure(name: str, match: Callable[[str], object], corpus: list[str]) -> float:
+    start = time.perf_counter()
+    for url in corpus:
+        match(url)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<12} {len(corpus) / elapsed:>12.0f} URLs/s {elapsed / len(corpus) * 1e6:>8.2f} us/URL"
+    )
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    args = parser.parse_args()
+
+    corpus = list(itertools.islice(itertools.cycle(SAMPLE_URLS), args.size))
+
+    guild_linear_scan = functools.partial(linear_scan, enabled_domains=GUILD_ENABLED_DOMAINS)
+    guild_matcher = get_website_matcher(frozenset(GUILD_ENABLED_DOMAINS))
+
+    for url in SAMPLE_URLS:
+        for expected, actual in (
+            (linear_scan(url), REGISTRY.website_matcher.match(url)),
+            (guild_linear_scan(url), guild_matcher.match(url)),
+        ):
+            if expected != actual:
+                msg = f"Mismatch for {url}: {expected} != {actual}"
+                raise AssertionError(msg)
+
+    linear = measure("linear scan", linear_scan, corpus)
+    index = measure("host index", REGISTRY.website_matcher.match, corpus)
+    print(f"speedup      {linear / index:>12.1f}x")
+
+    linear = measure("guild scan", guild_linear_scan, corpus)
+    index = measure("guild index", guild_matcher.match, corpus)
+    print(f"speedup      {linear / index:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
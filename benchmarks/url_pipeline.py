@@ -0,0 +1,197 @@
+"""Benchmark the text hot path of the fixer on a synthetic corpus of chat messages.
+
+Each message goes through the stages `_find_fixes` runs before any network access:
+extracting URL spans, cleaning URLs, matching them to a website and rewriting the
+message with the domain's default fix. Messages are plain chat, single links, several
+links, spoilered links, suppressed links and unsupported links, with a link for every
+domain in `DOMAINS`. Nothing touches Discord, the database or the network.
+
+Results can be written as JSON with `--output` and compared with an earlier run with
+`--compare`.
+
+Usage: `uv run python -m benchmarks.url_pipeline [--messages N] [--output PATH] [--compare PATH]`
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess  # noqa: S404
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from benchmarks.url_matching import SAMPLE_URLS
+from embed_fixer.cogs.fixer import _apply_fix_to_url, _fix_result_cache  # noqa: PLC2701
+from embed_fixer.fixes import DOMAINS, REGISTRY
+from embed_fixer.utils.misc import ParsedURL, iter_url_spans, replace_spans
+
+if TYPE_CHECKING:
+    from embed_fixer.fixes import Domain, Website
+    from embed_fixer.utils.misc import URLSpan
+
+STAGES = ("extract", "clean", "match", "rewrite", "total")
+WORDS = ("look", "at", "this", "lol", "same", "artist", "again", "wow", "nice", "ok", "<3")
+MESSAGE_KINDS = {
+    "plain": 40,
+    "single": 30,
+    "multi": 10,
+    "spoiler": 8,
+    "suppressed": 7,
+    "unsupported": 5,
+}
+"""Relative weight of each kind of message in the corpus."""
+
+
+def random_url(rng: random.Random, urls: list[str]) -> str:
+    # Randomize IDs so every message doesn't hit the same cache entries
+    return re.sub(r"\d+", lambda m: str(rng.randint(1, 10 ** len(m.group()))), rng.choice(urls))
+
+
+def make_message(
+    rng: random.Random, kind: str, supported: list[str], unsupported: list[str]
+) -> str:
+    words: list[str] = rng.choices(WORDS, k=rng.randint(1, 12))
+    match kind:
+        case "plain":
+            return " ".join(words)
+        case "single":
+            links = [random_url(rng, supported)]
+        case "multi":
+            links = [random_url(rng, supported) for _ in range(rng.randint(2, 5))]
+        case "spoiler":
+            links = [f"||{random_url(rng, supported)}||"]
+        case "suppressed":
+            links = [f"<{random_url(rng, supported)}>"]
+        case _:
+            links = [random_url(rng, unsupported)]
+
+    for link in links:
+        words.insert(rng.randint(0, len(words)), link)
+    return " ".join(words)
+
+
+def make_corpus(size: int, seed: int) -> list[str]:
+    supported = [url for url in SAMPLE_URLS if REGISTRY.website_matcher.match(url) is not None]
+    unsupported = [url for url in SAMPLE_URLS if url not in supported]
+
+    covered = {match[0].id for url in supported if (match := REGISTRY.website_matcher.match(url))}
+    if missing := [d.name for d in DOMAINS if d.id not in covered]:
+        msg = f"SAMPLE_URLS has no URL for {', '.join(missing)}"
+        raise AssertionError(msg)
+
+    rng = random.Random(seed)
+    kinds = rng.choices(list(MESSAGE_KINDS), weights=list(MESSAGE_KINDS.values()), k=size)
+    return [make_message(rng, kind, supported, unsupported) for kind in kinds]
+
+
+def run_pipeline(message: str, timings: dict[str, list[float]]) -> str:
+    t0 = time.perf_counter()
+    spans = [span for span in iter_url_spans(message) if not span.suppressed]
+    t1 = time.perf_counter()
+
+    cleaned: list[tuple[URLSpan, ParsedURL]] = []
+    for span in spans:
+        try:
+            cleaned.append(
+                (span, ParsedURL.parse(span.url).without_tracking_params().without_www())
+            )
+        except ValueError:
+            continue
+    t2 = time.perf_counter()
+
+    matched: list[tuple[URLSpan, ParsedURL, Domain, Website]] = []
+    for span, parsed_url in cleaned:
+        if result := REGISTRY.website_matcher.match(str(parsed_url)):
+            matched.append((span, parsed_url, *result))
+    t3 = time.perf_counter()
+
+    edits: list[tuple[int, int, str]] = []
+    for span, parsed_url, domain, website in matched:
+        fix_method = domain.default_fix_method
+        if fix_method is None or (
+            website.skip_method_ids and fix_method.id in website.skip_method_ids
+        ):
+            continue
+        if new_url := _apply_fix_to_url(parsed_url, fix_method, domain.id):
+            edits.append((span.start, span.end, new_url))
+    result = replace_spans(message, edits)
+    t4 = time.perf_counter()
+
+    for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0), strict=True):
+        timings[stage].append(elapsed)
+    return result
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    quantiles = statistics.quantiles(timings, n=100)
+    return {
+        "msgs_per_sec": len(timings) / sum(timings),
+        "p50_us": quantiles[49] * 1e6,
+        "p99_us": quantiles[98] * 1e6,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    for stage, stats in results["stages"].items():
+        line = (
+            f"{stage:<8} {stats['msgs_per_sec']:>12.0f} msgs/s "
+            f"p50 {stats['p50_us']:>8.2f} us p99 {stats['p99_us']:>8.2f} us"
+        )
+        if baseline is not None and stage in baseline["stages"]:
+            before = baseline["stages"][stage]["msgs_per_sec"]
+            line += f" {stats['msgs_per_sec'] / before - 1:>+8.1%} vs {baseline['commit']}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages, args.seed)
+    _fix_result_cache.clear()
+
+    # Warm up lazily compiled regexes and caches that live for the bot's whole lifetime
+    for message in corpus[:100]:
+        run_pipeline(message, {stage: [] for stage in STAGES})
+
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for message in corpus:
+        run_pipeline(message, timings)
+
+    results = {
+        "benchmark": "url_pipeline",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "messages": args.messages,
+        "seed": args.seed,
+        "stages": {stage: summarize(stage_timings) for stage, stage_timings in timings.items()},
+    }
+    baseline = None if args.compare is None else json.loads(args.compare.read_text())
+    print_results(results, baseline)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
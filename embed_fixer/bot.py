@@ -19,7 +19,7 @@ from embed_fixer.core.translator import translator
 from embed_fixer.utils.misc import get_project_version
 
 from .core.translator import AppCommandTranslator
-from .models import GuildSettings, GuildSettingsOld, GuildSettingsTable
+from .models import FixedMessage, GuildSettings, GuildSettingsOld, GuildSettingsTable, IgnoreMe
 
 if TYPE_CHECKING:
     from aiohttp import ClientSession
@@ -77,6 +77,8 @@ class EmbedFixer(commands.AutoShardedBot):
         await self._apply_migrations()
         await Tortoise.generate_schemas()
         await self._migrate_guild_settings()
+        await IgnoreMe.load()
+        await FixedMessage.load()
 
         async for filepath in anyio.Path("embed_fixer/cogs").glob("**/*.py"):
             cog_name = Path(filepath).stem
@@ -202,5 +204,9 @@ class EmbedFixer(commands.AutoShardedBot):
 
     async def close(self) -> None:
         logger.info("Bot shutting down...")
+        try:
+            await FixedMessage.flush()
+        except Exception:
+            logger.exception("Failed to flush fixed message records")
         await Tortoise.close_connections()
         await super().close()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, cast
 
 from discord.ext import commands
 
+from embed_fixer.fixes import get_website_matcher
+from embed_fixer.models import FixedMessage, GuildFixMethod, GuildSettings, UserSettings
+from embed_fixer.utils.db import enable_incremental_vacuum
+
 if TYPE_CHECKING:
     from discord.ext.commands.context import Context
 
+    from embed_fixer.cogs.fixer import FixerCog
+
     from ..bot import EmbedFixer
 
 
@@ -23,6 +29,27 @@ class Admin(commands.Cog):
         synced_commands = await self.bot.tree.sync()
         await message.edit(content=f"Synced {len(synced_commands)} commands.")
 
+    @commands.command(name="stats")
+    async def stats_command(self, ctx: commands.Context) -> Any:
+        lines = [
+            f"Guild settings cache: {GuildSettings.cache_info()}",
+            f"User settings cache: {UserSettings.cache_info()}",
+            f"Guild fix method cache: {GuildFixMethod.cache_info()}",
+            f"Website matchers: {get_website_matcher.cache_info()}",
+        ]
+        fixer = cast("FixerCog | None", self.bot.get_cog("FixerCog"))
+        if fixer is not None:
+            lines.extend(fixer.stats())
+        await ctx.send("\n".join(lines))
+
+    @commands.command(name="enable-incremental-vacuum")
+    async def enable_incremental_vacuum_command(self, ctx: commands.Context) -> Any:
+        # One-off conversion, the full VACUUM locks the database while it runs
+        enabled = await enable_incremental_vacuum(FixedMessage._meta.db)
+        await ctx.send(
+            "Incremental auto-vacuum enabled." if enabled else "Nothing to do for this database."
+        )
+
 
 async def setup(bot: EmbedFixer) -> None:
     await bot.add_cog(Admin(bot))
@@ -3,8 +3,9 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import datetime
-from typing import TYPE_CHECKING, Any, Final, Literal
-from urllib.parse import parse_qs, urlparse, urlunparse
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Final, Literal, NamedTuple, Self
+from urllib.parse import parse_qs
 
 import discord
 import emoji
@@ -15,23 +16,25 @@ from loguru import logger
 from pydantic import BaseModel, field_validator
 
 from embed_fixer.core.config import settings
+from embed_fixer.core.context import RequestContext, request_context, use_request_context
 from embed_fixer.core.translator import DEFAULT_LANG, translator
-from embed_fixer.fixes import DOMAINS, AppendURLFix, DomainId
+from embed_fixer.fixes import REGISTRY, AppendURLFix, DomainId
 from embed_fixer.models import FixedMessage, GuildFixMethod, GuildSettings, IgnoreMe, UserSettings
 from embed_fixer.settings import FixMode
+from embed_fixer.utils.cache import MISSING, TTLCache
+from embed_fixer.utils.db import incremental_vacuum
 from embed_fixer.utils.download_media import MediaDownloader
 from embed_fixer.utils.fetch_info import PostInfoFetcher
 from embed_fixer.utils.misc import (
-    append_path_to_url,
+    ParsedURL,
     capture_exception,
-    domain_in_url,
-    extract_urls,
     get_filesize,
-    remove_query_params,
-    replace_domain,
+    iter_url_spans,
+    replace_spans,
     sanitize_username,
     unsanitize_username,
 )
+from embed_fixer.utils.short_links import ShortLinkResolver
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
@@ -39,12 +42,18 @@ if TYPE_CHECKING:
     from embed_fixer.bot import EmbedFixer, Interaction
     from embed_fixer.fixes import Domain, FixMethod, ReplaceFix, Website
     from embed_fixer.utils.fetch_info import UgoiraMeta
+    from embed_fixer.utils.misc import URLSpan
 
 USERNAME_SUFFIX: Final[str] = " (Embed Fixer)"
 ERROR_MSG_DELETE_AFTER: Final[int] = 10
 DEFAULT_FILESIZE_LIMIT: Final[int] = 10 * 1024 * 1024  # 10 MB
 ROTATE_FIX_EMOJI: Final[str] = "🔄"
-FIXED_MESSAGE_RETENTION_DAYS: Final[int] = 90
+FIXED_MESSAGE_PURGE_BATCH_DELAY: Final[float] = 0.1  # seconds
+IGNORE_ME_REFRESH_MINUTES: Final[int] = 5
+FIXED_MESSAGE_FLUSH_INTERVAL: Final[float] = 0.5  # seconds
+FIX_RESULT_CACHE_SIZE: Final[int] = 10_000
+FIX_RESULT_CACHE_TTL: Final[int] = 600  # seconds
+FIND_FIXES_CONCURRENCY: Final[int] = 4  # URLs of a message processed at the same time
 
 type SendType = Literal["webhook", "reply", "channel", "resend", "interaction"]
 
@@ -88,6 +97,24 @@ class PostExtractionResult(BaseModel):
         return emoji.replace_emoji(v, "")
 
 
+class _MatchedURL(NamedTuple):
+    url: str
+    parsed_url: ParsedURL
+    domain: Domain
+    website: Website
+
+
+class _FixedURL(NamedTuple):
+    url: str
+    fix_method: FixMethod
+
+
+class _URLOutcome(NamedTuple):
+    span: URLSpan
+    matched: _MatchedURL
+    extraction: PostExtractionResult | None
+
+
 class FindFixResult(BaseModel):
     fix_found: bool
     medias: list[Media]
@@ -105,74 +132,135 @@ def _parse_new_domain_parts(new_domain: str) -> tuple[str, str]:
     return new_domain, ""
 
 
-def _reverse_parse_fixed_url(url: str) -> tuple[Domain, FixMethod, str] | None:
-    """Given a fixed URL from a bot message, return (Domain, FixMethod, original_url).
+@dataclass(frozen=True, slots=True, kw_only=True)
+class _CompiledFix:
+    """A fix of a domain's fix method, with the netloc and path it produces parsed once."""
 
-    Iterates over all DOMAINS/fix_methods and reverses the fix transformation.
-    Returns None if the URL doesn't match any known fix.
-    """
-    parsed = urlparse(url)
+    domain: Domain
+    fix_method: FixMethod
+    fix: ReplaceFix | AppendURLFix
+    netloc: str
+    path_prefix: str
+
+    @classmethod
+    def compile(cls, domain: Domain, fix_method: FixMethod, fix: ReplaceFix | AppendURLFix) -> Self:
+        netloc, path_prefix = _parse_new_domain_parts(
+            fix.domain if isinstance(fix, AppendURLFix) else fix.new_domain
+        )
+        return cls(
+            domain=domain, fix_method=fix_method, fix=fix, netloc=netloc, path_prefix=path_prefix
+        )
 
-    def path_prefix_len(fix: ReplaceFix | AppendURLFix) -> int:
+    def apply(self, url: ParsedURL) -> ParsedURL | None:
+        """Return the fixed URL, or `None` if this fix doesn't apply to `url`."""
+        fix = self.fix
         if isinstance(fix, AppendURLFix):
-            _, prefix = _parse_new_domain_parts(fix.domain)
-        else:
-            _, prefix = _parse_new_domain_parts(fix.new_domain)
-        return len(prefix)
-
-    for domain in DOMAINS:
-        for fix_method in domain.fix_methods:
-            # Check more-specific (longer path prefix) fixes first to avoid ambiguity
-            for fix in sorted(fix_method.fixes, key=path_prefix_len, reverse=True):
-                if isinstance(fix, AppendURLFix):
-                    fix_netloc, fix_path = _parse_new_domain_parts(fix.domain)
-                    if parsed.netloc != fix_netloc or parsed.path != fix_path:
-                        continue
-                    params = parse_qs(parsed.query)
-                    if "url" not in params:
-                        continue
-                    return domain, fix_method, params["url"][0]
-
-                fix_netloc, fix_path_prefix = _parse_new_domain_parts(fix.new_domain)
-                if parsed.netloc != fix_netloc:
-                    continue
-                if fix_path_prefix and not parsed.path.startswith(fix_path_prefix):
-                    continue
-                original_path = (
-                    parsed.path[len(fix_path_prefix) :] if fix_path_prefix else parsed.path
-                )
-                original_url = urlunparse(
-                    parsed._replace(netloc=fix.old_domain, path=original_path or "/")
-                )
-                return domain, fix_method, original_url
+            query = f"url={url}"
+            if self.domain.id == DomainId.FACEBOOK:
+                # For facebook, replace /v/ with /r/, found by @zzxc.
+                query = query.replace("/v/", "/r/")
+            return ParsedURL("https", self.netloc, self.path_prefix, query=query)
+
+        if not url.is_on(fix.old_domain):
+            return None
+        return url.replace(netloc=self.netloc, path=self.path_prefix + url.path)
+
+    def revert(self, url: ParsedURL) -> ParsedURL | None:
+        """Return the original URL of a URL fixed by this fix, or `None` if it wasn't."""
+        fix = self.fix
+        if isinstance(fix, AppendURLFix):
+            if url.path != self.path_prefix:
+                return None
+            params = parse_qs(url.query)
+            return ParsedURL.parse(params["url"][0]) if "url" in params else None
+
+        if self.path_prefix and not url.path.startswith(self.path_prefix):
+            return None
+        original_path = url.path[len(self.path_prefix) :] if self.path_prefix else url.path
+        return url.replace(netloc=fix.old_domain, path=original_path or "/")
+
 
+def _compile_fixes() -> dict[tuple[DomainId, int], tuple[_CompiledFix, ...]]:
+    return {
+        (domain.id, fix_method.id): tuple(
+            _CompiledFix.compile(domain, fix_method, fix) for fix in fix_method.fixes
+        )
+        for domain in REGISTRY.domains
+        for fix_method in domain.fix_methods
+    }
+
+
+_FIX_TABLE: Final = _compile_fixes()
+"""Compiled fixes of each `(DomainId, FixMethod.id)`, in the fix method's order."""
+
+
+def _build_reverse_fix_index() -> dict[str, tuple[_CompiledFix, ...]]:
+    index: dict[str, list[_CompiledFix]] = {}
+    for fixes in _FIX_TABLE.values():
+        # Check more-specific (longer path prefix) fixes first to avoid ambiguity
+        for fix in sorted(fixes, key=lambda f: len(f.path_prefix), reverse=True):
+            index.setdefault(fix.netloc, []).append(fix)
+    return {netloc: tuple(fixes) for netloc, fixes in index.items()}
+
+
+_REVERSE_FIX_INDEX: Final = _build_reverse_fix_index()
+"""Compiled fixes by the netloc of the URLs they produce, in `DOMAINS` order."""
+
+
+def _reverse_parse_fixed_url(url: str) -> tuple[Domain, FixMethod, ParsedURL] | None:
+    """Given a fixed URL from a bot message, return (Domain, FixMethod, original_url).
+
+    Returns None if the URL doesn't match any known fix.
+    """
+    parsed = ParsedURL.parse(url)
+    for fix in _REVERSE_FIX_INDEX.get(parsed.netloc, ()):
+        original_url = fix.revert(parsed)
+        if original_url is not None:
+            return fix.domain, fix.fix_method, original_url
     return None
 
 
-def _get_next_fix_method(domain: Domain, current_fix_id: int) -> FixMethod | None:
-    """Return the next fix method in the domain's list (wrapping). None if only one exists."""
-    if len(domain.fix_methods) <= 1:
-        return None
-    current_idx = next(
-        (i for i, m in enumerate(domain.fix_methods) if m.id == current_fix_id), None
-    )
-    if current_idx is None:
-        return None
-    return domain.fix_methods[(current_idx + 1) % len(domain.fix_methods)]
+_fix_result_cache: TTLCache[tuple[str, DomainId, int, str | None], str | None] = TTLCache(
+    maxsize=FIX_RESULT_CACHE_SIZE, ttl=FIX_RESULT_CACHE_TTL
+)
+"""Fixed URLs by clean URL, domain, fix method and translation language."""
 
 
-def _apply_fix_to_url(original_url: str, fix_method: FixMethod, domain_id: DomainId) -> str | None:
-    """Apply a FixMethod to original_url, returning the new fixed URL."""
-    for fix in fix_method.fixes:
-        if isinstance(fix, AppendURLFix):
-            new_url = f"https://{fix.domain}?url={original_url}"
-            if domain_id == DomainId.FACEBOOK:
-                new_url = new_url.replace("/v/", "/r/")
-            return new_url
-        if not domain_in_url(original_url, fix.old_domain):
+def _apply_fix_to_url(
+    original_url: ParsedURL,
+    fix_method: FixMethod,
+    domain_id: DomainId,
+    *,
+    translang: str | None = None,
+) -> str | None:
+    """Apply a FixMethod to original_url, returning the new fixed URL.
+
+    FxEmbed links are translated to `translang` if given. Results are cached, since
+    popular links tend to be posted many times in a short period.
+    """
+    if fix_method.id != 1:  # Only FxEmbed supports translation
+        translang = None
+
+    key = (str(original_url), domain_id, fix_method.id, translang)
+    cached = _fix_result_cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+
+    new_url = None
+    for fix in _FIX_TABLE[domain_id, fix_method.id]:
+        fixed_url = fix.apply(original_url)
+        if fixed_url is None:
             continue
-        return replace_domain(original_url, fix.old_domain, fix.new_domain)
-    return None
+
+        if translang:
+            # FxEmbed (fxtwitter) can translate posts by appending /{lang}
+            # See https://github.com/FxEmbed/FxEmbed#translate-posts-xtwitter for more info
+            fixed_url = fixed_url.append_path(f"/{translang}")
+        new_url = str(fixed_url)
+        break
+
+    _fix_result_cache.set(key, new_url)
+    return new_url
 
 
 async def add_reaction_safe(message: discord.Message, emoji: str) -> None:
@@ -203,17 +291,26 @@ class FixerCog(commands.Cog):
     def __init__(self, bot: EmbedFixer) -> None:
         self.bot = bot
         self.fetch_info = PostInfoFetcher(self.bot.session)
+        self.short_links = (
+            ShortLinkResolver(self.bot.session, redis_url=settings.redis_url)
+            if settings.resolve_short_links
+            else None
+        )
         self.fix_embed_ctx = app_commands.ContextMenu(
             name=app_commands.locale_str("fix_embed"), callback=self.fix_embed
         )
         self.extract_medias_ctx = app_commands.ContextMenu(
             name=app_commands.locale_str("extract_medias"), callback=self.extract_medias
         )
+        self.prefiltered_messages = 0
+        """Number of messages dropped by `_may_need_handling` before any database access."""
 
     async def cog_load(self) -> None:
         self.bot.tree.add_command(self.fix_embed_ctx)
         self.bot.tree.add_command(self.extract_medias_ctx)
         self._purge_fixed_message_records.start()
+        self._refresh_ignore_me.start()
+        self._flush_fixed_message_records.start()
 
     async def cog_unload(self) -> None:
         self.bot.tree.remove_command(self.fix_embed_ctx.name, type=self.fix_embed_ctx.type)
@@ -221,23 +318,63 @@ class FixerCog(commands.Cog):
             self.extract_medias_ctx.name, type=self.extract_medias_ctx.type
         )
         self._purge_fixed_message_records.cancel()
+        self._refresh_ignore_me.cancel()
+        self._flush_fixed_message_records.cancel()
+        if self.short_links is not None:
+            await self.short_links.close()
 
     @tasks.loop(hours=24)
     async def _purge_fixed_message_records(self) -> None:
-        cutoff = discord.utils.utcnow() - datetime.timedelta(days=FIXED_MESSAGE_RETENTION_DAYS)
-        deleted = await FixedMessage.filter(created_at__lt=cutoff).delete()
+        cutoff = discord.utils.utcnow() - datetime.timedelta(
+            days=settings.fixed_message_retention_days
+        )
+        deleted = await FixedMessage.purge(
+            cutoff,
+            batch_size=settings.fixed_message_purge_batch_size,
+            delay=FIXED_MESSAGE_PURGE_BATCH_DELAY,
+        )
         if deleted:
-            logger.info(f"Purged {deleted} fixed message records")
+            reclaimed = await incremental_vacuum(FixedMessage._meta.db)
+            logger.info(
+                f"Purged {deleted} fixed message records, reclaimed {reclaimed / 1024:.0f} KiB"
+            )
 
-    @staticmethod
-    def _skip_channel(settings: GuildSettings | None, channel_id: int) -> bool:
-        if settings is None:
-            return False
+    @tasks.loop(minutes=IGNORE_ME_REFRESH_MINUTES)
+    async def _refresh_ignore_me(self) -> None:
+        # Picks up /ignore-me toggles made by other processes sharing the database
+        try:
+            await IgnoreMe.refresh()
+        except Exception:
+            logger.exception("Failed to refresh ignore-me records")
 
-        if settings.enable_fix_channels and channel_id not in settings.enable_fix_channels:
-            return True
+    @tasks.loop(seconds=FIXED_MESSAGE_FLUSH_INTERVAL)
+    async def _flush_fixed_message_records(self) -> None:
+        try:
+            await FixedMessage.flush()
+        except Exception:
+            logger.exception("Failed to flush fixed message records")
+
+    def stats(self) -> list[str]:
+        """Counters and cache stats of the fixer, shown by the owner's `stats` command."""
+        lines = [
+            f"Pre-filtered messages: {self.prefiltered_messages}",
+            f"Fix result cache: {_fix_result_cache.info()}",
+            f"Post fetches saved: {self.fetch_info.fetches_saved}",
+        ]
+        lines.extend(
+            f"{domain_id.name.title()} post cache: {info}"
+            for domain_id, info in self.fetch_info.cache_info().items()
+        )
+        if self.short_links is not None:
+            lines.append(
+                f"Short link cache: {self.short_links.info()} "
+                f"requests={self.short_links.requests} coalesced={self.short_links.coalesced}"
+            )
+        return lines
 
-        return channel_id in settings.disable_fix_channels
+    @staticmethod
+    def _skip_channel(settings: GuildSettings | None, channel_id: int) -> bool:
+        return settings is not None and settings.snapshot.skip_channel(channel_id)
 
     async def _nsfw_skip(self, url: str, domain: Domain, *, is_nsfw_channel: bool) -> bool:
         """Skip NSFW domains if the channel is not NSFW."""
@@ -275,7 +412,7 @@ class FixerCog(commands.Cog):
         Uses the database record when available, falling back to display name matching
         for messages sent before fixed messages were tracked.
         """
-        fixed = await FixedMessage.get_or_none(id=message.id)
+        fixed = await FixedMessage.get_known(message.id)
         if fixed is not None:
             member = guild.get_member(fixed.author_id)
             if member is None:
@@ -285,6 +422,23 @@ class FixerCog(commands.Cog):
 
         return await self._get_original_author(message, guild)
 
+    @staticmethod
+    def _may_need_handling(message: discord.Message) -> bool:
+        """Whether the message can need handling, checked without any database or network access.
+
+        A message needs handling if it contains a link to a known host, or if it is replying
+        to a webhook message (see `_handle_reply`).
+        """
+        content = message.content
+        if "https://" in content and REGISTRY.host_pattern.search(content) is not None:
+            return True
+
+        return (
+            message.reference is not None
+            and isinstance(message.reference.resolved, discord.Message)
+            and message.reference.resolved.webhook_id is not None
+        )
+
     @staticmethod
     def _is_fixed_webhook_message(message: discord.Message) -> bool:
         """Whether this message is a fixed message sent through an Embed Fixer webhook."""
@@ -303,7 +457,7 @@ class FixerCog(commands.Cog):
             if the message is not recognized as a fixed message or the author cannot be
             resolved.
         """
-        fixed = await FixedMessage.get_or_none(id=message.id)
+        fixed = await FixedMessage.get_known(message.id)
         if fixed is not None:
             return fixed.send_type, fixed.author_id
 
@@ -332,20 +486,17 @@ class FixerCog(commands.Cog):
         if not domain.fix_methods:
             return None
 
-        guild_fix_method = (
-            None
-            if settings is None
-            else await GuildFixMethod.get_or_none(guild_id=settings.id, domain_id=domain.id)
-        )
-        if guild_fix_method is None:
+        if settings is None:
+            return domain.default_fix_method
+
+        fix_id = (await GuildFixMethod.get_fix_ids(settings.id)).get(domain.id)
+        if fix_id is None:
+            return domain.default_fix_method
+
+        fix_method = domain.get_fix_method(fix_id)
+        if fix_method is None:
             fix_method = domain.default_fix_method
-        else:
-            fix_method = next(
-                (f for f in domain.fix_methods if f.id == guild_fix_method.fix_id), None
-            )
-            if fix_method is None:
-                fix_method = domain.default_fix_method
-                asyncio.create_task(guild_fix_method.delete())
+            asyncio.create_task(GuildFixMethod.remove_fix_id(settings.id, domain.id))
 
         return fix_method
 
@@ -353,35 +504,129 @@ class FixerCog(commands.Cog):
     def _get_matching_domain_website(
         settings: GuildSettings | None, clean_url: str
     ) -> tuple[Domain | None, Website | None]:
-        domain: Domain | None = None
-        website: Website | None = None
+        matcher = (
+            REGISTRY.website_matcher if settings is None else settings.snapshot.website_matcher
+        )
+        return matcher.match(clean_url) or (None, None)
 
-        for d in DOMAINS:
-            if settings is not None and (
-                d.id in settings.disabled_domains
-                or (not d.enabled_by_default and d.id not in settings.enabled_domains)
-            ):
-                continue
+    async def _resolve_short_link(
+        self, settings: GuildSettings | None, parsed_url: ParsedURL
+    ) -> tuple[ParsedURL, Domain, Website] | None:
+        """Resolve a short link to its canonical URL, if it is a supported website too."""
+        if self.short_links is None:
+            return None
 
-            for w in d.websites:
-                if w.match(clean_url):
-                    domain = d
-                    website = w
-                    break
+        resolved = await self.short_links.resolve(str(parsed_url))
+        if resolved is None:
+            return None
 
-                # Break from outer loop
-            else:
-                continue
-            break
-        return domain, website
+        try:
+            resolved_url = ParsedURL.parse(resolved).without_tracking_params().without_www()
+        except ValueError:
+            return None
 
-    @staticmethod
-    def _apply_fxembed_translation(url: str, *, translang: str) -> str:
-        # FxEmbed (fxtwitter) can translate posts by appending /{lang}
-        # See https://github.com/FxEmbed/FxEmbed#translate-posts-xtwitter for more info
-        return append_path_to_url(url, f"/{translang}")
+        domain, website = self._get_matching_domain_website(settings, str(resolved_url))
+        if domain is None or website is None:
+            return None
+        return resolved_url, domain, website
+
+    async def _match_url(
+        self, url: str, *, settings: GuildSettings | None, is_nsfw_channel: bool
+    ) -> _MatchedURL | None:
+        """Clean a URL and find its website, or None if it's unsupported or NSFW-skipped."""
+        try:
+            parsed_url = ParsedURL.parse(url).without_tracking_params().without_www()
+        except ValueError:
+            logger.warning(f"Invalid URL found: {url}")
+            return None
+
+        clean_url = str(parsed_url)
+        domain, website = self._get_matching_domain_website(settings, clean_url)
+
+        if domain is None or website is None:
+            return None
+
+        if website.short_link and (
+            resolved := await self._resolve_short_link(settings, parsed_url)
+        ):
+            parsed_url, domain, website = resolved
+            clean_url = str(parsed_url)
+        logger.debug(f"Matched domain {domain.id!r} for URL: {clean_url}")
+
+        if await self._nsfw_skip(url, domain, is_nsfw_channel=is_nsfw_channel):
+            return None
+
+        return _MatchedURL(url, parsed_url, domain, website)
+
+    async def _rewrite_url(
+        self, matched: _MatchedURL, *, settings: GuildSettings | None
+    ) -> _FixedURL | None:
+        """Apply the fix method chosen for the URL's domain, or None if there's none."""
+        _, parsed_url, domain, website = matched
+
+        fix_method = await self._determine_fix_method(settings, domain)
+        if (
+            fix_method is None
+            or not fix_method.fixes
+            or (website.skip_method_ids and fix_method.id in website.skip_method_ids)
+        ):
+            logger.debug(f"No valid fix method for domain {domain.id!r} and URL: {parsed_url}")
+            return None
 
-    async def _find_fixes(  # noqa: C901, PLR0912, PLR0914, PLR0915
+        new_url = _apply_fix_to_url(
+            parsed_url,
+            fix_method,
+            domain.id,
+            translang=None if settings is None else settings.translate_target_lang,
+        )
+        if new_url is None:
+            return None
+        logger.debug(f"Fixed URL {parsed_url} with {fix_method.name}: {new_url}")
+
+        return _FixedURL(new_url, fix_method)
+
+    async def _rewrite_urls(
+        self,
+        matches: Sequence[_MatchedURL | None],
+        *,
+        settings: GuildSettings | None,
+        semaphore: asyncio.Semaphore,
+    ) -> list[_FixedURL | None]:
+        """Rewrite matched URLs concurrently, keeping None for the ones that didn't match."""
+
+        async def rewrite(matched: _MatchedURL | None) -> _FixedURL | None:
+            if matched is None:
+                return None
+            async with semaphore:
+                return await self._rewrite_url(matched, settings=settings)
+
+        return await asyncio.gather(*(rewrite(matched) for matched in matches))
+
+    async def fix_urls(
+        self,
+        urls: Sequence[str],
+        *,
+        settings: GuildSettings | None,
+        is_nsfw_channel: bool,
+        concurrency: int = FIND_FIXES_CONCURRENCY,
+    ) -> list[str | None]:
+        """Fix URLs concurrently, returning the fixed URL of each or None if it isn't fixed.
+
+        At most `concurrency` URLs are matched or rewritten at the same time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def match(url: str) -> _MatchedURL | None:
+            async with semaphore:
+                return await self._match_url(
+                    url, settings=settings, is_nsfw_channel=is_nsfw_channel
+                )
+
+        matches = await asyncio.gather(*(match(url) for url in urls))
+        fixes = await self._rewrite_urls(matches, settings=settings, semaphore=semaphore)
+        return [None if fixed is None else fixed.url for fixed in fixes]
+
+    async def _find_fixes(  # noqa: PLR0913, PLR0914, PLR0915
         self,
         message: discord.Message | MockMessage,
         *,
@@ -389,8 +634,10 @@ class FixerCog(commands.Cog):
         filesize_limit: int,
         extract_media: bool = False,
         is_ctx_menu: bool = False,
+        concurrency: int = FIND_FIXES_CONCURRENCY,
     ) -> FindFixResult:
         channel_id = message.channel.id
+        snapshot = None if settings is None else settings.snapshot
 
         fix_found = False
         medias: list[Media] = []
@@ -412,105 +659,96 @@ class FixerCog(commands.Cog):
                 and message.channel.parent.nsfw
             )
         )
-        urls = extract_urls(message.content)
+        spans = [span for span in iter_url_spans(message.content) if not span.suppressed]
+        content_edits: list[tuple[int, int, str]] = []
+        recommend_original_link_btn = False
 
-        for url, spoilered in urls:
-            try:
-                clean_url = remove_query_params(url).replace("www.", "")
-            except ValueError:
-                logger.warning(f"Invalid URL found: {url}")
-                continue
+        extract = extract_media or (
+            snapshot is not None and channel_id in snapshot.extract_media_channels
+        )
+        spoiler_medias = is_nsfw_channel and (
+            snapshot is not None and channel_id not in snapshot.disable_image_spoilers
+        )
+        semaphore = asyncio.Semaphore(concurrency)
 
-            domain, website = self._get_matching_domain_website(settings, clean_url)
+        async def process_url(span: URLSpan) -> _URLOutcome | None:
+            async with semaphore:
+                matched = await self._match_url(
+                    span.url, settings=settings, is_nsfw_channel=is_nsfw_channel
+                )
+                if matched is None:
+                    return None
+
+                extraction = None
+                if extract:
+                    if not is_ctx_menu and isinstance(message, discord.Message):
+                        asyncio.create_task(add_reaction_safe(message, "⌛"))
+
+                    extraction = await self._extract_post_info(
+                        matched.domain.id,
+                        span.url,
+                        spoiler=span.spoilered or spoiler_medias,
+                        filesize_limit=filesize_limit,
+                    )
+                    logger.debug(f"Extracted {len(extraction.medias)} media files from {span.url}")
 
-            if domain is None or website is None:
-                continue
-            logger.debug(f"Matched domain {domain.id!r} for URL: {clean_url}")
+                return _URLOutcome(span, matched, extraction)
 
-            if await self._nsfw_skip(url, domain, is_nsfw_channel=is_nsfw_channel):
-                continue
+        # Each URL can await NSFW checks, DB lookups and media extraction, so process them
+        # concurrently and merge the outcomes in message order below
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(process_url(span)) for span in spans]
+        except ExceptionGroup as e:
+            raise e.exceptions[0] from None
+
+        outcomes = [task.result() for task in tasks]
+        # Rewritten in one batch, the same way as fix_urls
+        fixes = await self._rewrite_urls(
+            [None if outcome is None or extract_media else outcome.matched for outcome in outcomes],
+            settings=settings,
+            semaphore=semaphore,
+        )
 
-            if extract_media or (
-                settings is not None and channel_id in settings.extract_media_channels
-            ):
-                if not is_ctx_menu and isinstance(message, discord.Message):
-                    asyncio.create_task(add_reaction_safe(message, "⌛"))
+        for outcome, fixed in zip(outcomes, fixes, strict=True):
+            if outcome is None:
+                continue
+            span, matched, extraction = outcome
 
-                spoiler = spoilered or (
-                    is_nsfw_channel
-                    and (settings is not None and channel_id not in settings.disable_image_spoilers)
-                )
-                result = await self._extract_post_info(
-                    domain.id, url, spoiler=spoiler, filesize_limit=filesize_limit
-                )
+            if extraction is not None:
                 medias.extend(
                     Media(url=media.url)
                     if (media.file and get_filesize(media.file.fp) > filesize_limit)
                     else media
-                    for media in result.medias
+                    for media in extraction.medias
                 )
-                content, author_md = result.content, result.author_md
-                logger.debug(f"Extracted {len(result.medias)} media files from {url}")
+                content, author_md = extraction.content, extraction.author_md
 
                 if medias:
                     fix_found = True
-                    if spoilered:
-                        message.content = message.content.replace(f"||{url}||", "")
-                    else:
-                        message.content = message.content.replace(url, "")
+                    content_edits.append((span.outer_start, span.outer_end, ""))
 
-                    sauces.append(clean_url)
+                    sauces.append(str(matched.parsed_url))
                     continue
 
-            if extract_media:
+            if fixed is None:
                 continue
 
-            fix_method = await self._determine_fix_method(settings, domain)
-            if (
-                fix_method is None
-                or not fix_method.fixes
-                or (website.skip_method_ids and fix_method.id in website.skip_method_ids)
+            if fixed.fix_method.has_ads and (
+                settings is not None and not settings.show_original_link_btn
             ):
-                logger.debug(f"No valid fix method for domain {domain.id!r} and URL: {clean_url}")
-                continue
+                recommend_original_link_btn = True
 
-            for fix in fix_method.fixes:
-                if isinstance(fix, AppendURLFix):
-                    new_url = f"https://{fix.domain}?url={clean_url}"
-                    if domain.id == DomainId.FACEBOOK:
-                        # For facebook, replace /v/ with /r/, found by @zzxc.
-                        new_url = new_url.replace("/v/", "/r/")
-                else:
-                    if not domain_in_url(clean_url, fix.old_domain):
-                        continue
-
-                    new_url = replace_domain(clean_url, fix.old_domain, fix.new_domain)
-                    logger.debug(f"Replaced domain {fix.old_domain} with {fix.new_domain}")
-
-                    if (
-                        fix_method.id == 1
-                        and settings is not None
-                        and settings.translate_target_lang
-                    ):  # FxEmbed
-                        new_url = self._apply_fxembed_translation(
-                            new_url, translang=settings.translate_target_lang
-                        )
-
-                if fix_method.has_ads and (
-                    settings is not None and not settings.show_original_link_btn
-                ):
-                    # If the fix method has ads and the guild hasn't enabled
-                    # "Show Original Link Button", recommend enabling it.
-                    guild_lang = await translator.get_guild_lang(message.guild)
-                    recommend_msg = translator.translate(
-                        "recommend_original_link_btn", lang=guild_lang
-                    )
-                    message.content = f"-# {recommend_msg}\n{message.content}"
+            fix_found = True
+            content_edits.append((span.start, span.end, fixed.url))
 
-                fix_found = True
-                message.content = message.content.replace(url, new_url)
-
-                break
+        message.content = replace_spans(message.content, content_edits)
+        if recommend_original_link_btn:
+            # If the fix method has ads and the guild hasn't enabled
+            # "Show Original Link Button", recommend enabling it.
+            guild_lang = await translator.get_guild_lang(message.guild)
+            recommend_msg = translator.translate("recommend_original_link_btn", lang=guild_lang)
+            message.content = f"-# {recommend_msg}\n{message.content}"
 
         return FindFixResult(
             fix_found=fix_found,
@@ -518,7 +756,7 @@ class FixerCog(commands.Cog):
             sauces=sauces,
             content=content,
             author_md=author_md,
-            urls=[url for url, _ in urls],
+            urls=[span.url for span in spans],
         )
 
     async def _extract_post_info(
@@ -627,7 +865,7 @@ class FixerCog(commands.Cog):
         show_post_content = (
             None
             if guild_settings is None
-            else message.channel.id in guild_settings.show_post_content_channels
+            else message.channel.id in guild_settings.snapshot.show_post_content_channels
         )
 
         if show_post_content:
@@ -903,7 +1141,12 @@ class FixerCog(commands.Cog):
         )
 
         # Determine the fix mode, the user's setting overrides the guild's
-        user_settings = await UserSettings.get_or_none(id=message.author.id)
+        ctx = request_context.get()
+        user_settings = (
+            await UserSettings.get_or_none(id=message.author.id)
+            if ctx is None
+            else await ctx.get_user_settings()
+        )
         fix_mode = FixMode.DELETE_AND_RESEND if guild_settings is None else guild_settings.fix_mode
         if user_settings is not None and user_settings.fix_mode is not None:
             fix_mode = user_settings.fix_mode
@@ -933,7 +1176,7 @@ class FixerCog(commands.Cog):
                 return None
 
         if fix_message is not None and message.guild is not None:
-            await FixedMessage.create(
+            FixedMessage.add(
                 id=fix_message.id,
                 guild_id=message.guild.id,
                 channel_id=fix_message.channel.id,
@@ -1103,7 +1346,7 @@ class FixerCog(commands.Cog):
         if payload.guild_id is None or payload.user_id == self.bot.user.id:
             return
 
-        fixed = await FixedMessage.get_or_none(id=payload.message_id)
+        fixed = await FixedMessage.get_known(payload.message_id)
         if fixed is not None:
             author_id = fixed.author_id
         else:
@@ -1254,18 +1497,18 @@ class FixerCog(commands.Cog):
             return
 
         # Find the first domain that has a next fix method to rotate to
-        urls = extract_urls(message.content)
+        spans = [span for span in iter_url_spans(message.content) if not span.suppressed]
         first_domain: Domain | None = None
         next_fix: FixMethod | None = None
 
-        for url, _ in urls:
-            parsed_result = _reverse_parse_fixed_url(url)
+        for span in spans:
+            parsed_result = _reverse_parse_fixed_url(span.url)
             if parsed_result is None:
                 continue
             domain, current_fix_method, _ = parsed_result
             if first_domain is None:
                 first_domain = domain
-                next_fix = _get_next_fix_method(domain, current_fix_method.id)
+                next_fix = domain.get_next_fix_method(current_fix_method.id)
                 if next_fix is None:
                     return  # Domain has only one fix method
                 break
@@ -1274,26 +1517,24 @@ class FixerCog(commands.Cog):
             return
 
         # Replace every URL that belongs to the same domain with the new fix applied
-        new_content = message.content
-        for url, _ in urls:
-            parsed_result = _reverse_parse_fixed_url(url)
+        content_edits: list[tuple[int, int, str]] = []
+        for span in spans:
+            parsed_result = _reverse_parse_fixed_url(span.url)
             if parsed_result is None:
                 continue
             domain, _, original_url = parsed_result
             if domain.id != first_domain.id:
                 continue
 
-            new_url = _apply_fix_to_url(original_url, next_fix, domain.id)
+            new_url = _apply_fix_to_url(
+                original_url, next_fix, domain.id, translang=settings.translate_target_lang
+            )
             if new_url is None:
                 continue
 
-            if next_fix.id == 1 and settings.translate_target_lang:
-                new_url = self._apply_fxembed_translation(
-                    new_url, translang=settings.translate_target_lang
-                )
-
-            new_content = new_content.replace(url, new_url)
+            content_edits.append((span.start, span.end, new_url))
 
+        new_content = replace_spans(message.content, content_edits)
         if new_content == message.content:
             return
 
@@ -1317,16 +1558,16 @@ class FixerCog(commands.Cog):
 
     @commands.Cog.listener("on_raw_message_delete")
     async def remove_fixed_message_record(self, payload: discord.RawMessageDeleteEvent) -> None:
-        await FixedMessage.filter(id=payload.message_id).delete()
+        await FixedMessage.remove((payload.message_id,))
 
     @commands.Cog.listener("on_raw_bulk_message_delete")
     async def remove_fixed_message_records(
         self, payload: discord.RawBulkMessageDeleteEvent
     ) -> None:
-        await FixedMessage.filter(id__in=payload.message_ids).delete()
+        await FixedMessage.remove(payload.message_ids)
 
     @commands.Cog.listener("on_message")
-    async def embed_fixer(self, message: discord.Message) -> None:
+    async def embed_fixer(self, message: discord.Message) -> None:  # noqa: PLR0911
         if message.content.startswith(f"{self.bot.user.mention} jsk py"):
             return
 
@@ -1336,15 +1577,23 @@ class FixerCog(commands.Cog):
             self._is_fixed_webhook_message(message)
             or self.bot.user.id == author.id
             or guild is None
-            or await IgnoreMe.contains(author.id)
         ):
             return
 
+        if not self._may_need_handling(message):
+            self.prefiltered_messages += 1
+            return
+
+        if await IgnoreMe.contains(author.id):
+            return
+
         guild_settings, _ = await GuildSettings.get_or_create(id=guild.id)
         whitelist_role_skip = (
             isinstance(author, discord.Member)
-            and guild_settings.whitelist_role_ids
-            and not any(role.id in guild_settings.whitelist_role_ids for role in author.roles)
+            and guild_settings.snapshot.whitelist_role_ids
+            and guild_settings.snapshot.whitelist_role_ids.isdisjoint(
+                role.id for role in author.roles
+            )
         )
         if (
             self._skip_channel(guild_settings, channel.id)
@@ -1353,49 +1602,57 @@ class FixerCog(commands.Cog):
         ):
             return
 
-        try:
-            result = await self._find_fixes(
-                message, settings=guild_settings, filesize_limit=guild.filesize_limit
-            )
-        except Exception as e:
-            capture_exception(e)
-            return
-
-        logger.debug(f"FindFixResult for message {message.id} in {guild.id=}: {result}")
-
-        if result.fix_found:
+        ctx = RequestContext(
+            guild=guild,
+            user_id=author.id,
+            filesize_limit=guild.filesize_limit,
+            guild_settings=guild_settings,
+        )
+        with use_request_context(ctx):
             try:
-                send_type = await self._send_fixes(
-                    message,
-                    result,
-                    guild_settings=guild_settings,
-                    filesize_limit=guild.filesize_limit,
+                result = await self._find_fixes(
+                    message, settings=guild_settings, filesize_limit=ctx.filesize_limit
                 )
-            except discord.HTTPException:
-                logger.warning(f"Failed to send fixes in {channel.id=} in {guild.id=}")
-                return
             except Exception as e:
                 capture_exception(e)
                 return
 
-            if send_type in {"webhook", "channel"}:
-                # send_type is only "channel" when delete_original_message_in_threads is enabled
-                # this is checked in _send_via_fix_mode.
-                await self.delete_message_safe(message, channel, guild)
-            elif send_type in {"reply", "resend"}:
-                await self.suppress_embed_safe(message, channel, guild)
-                await remove_reaction_safe(message, "⌛", guild.me)
-
-        # If this is a normal message (no embed fix found) replying to a webhook message,
-        # reply to this message containing mention to the original author of the webhook message.
-        elif (
-            message.reference is not None
-            and isinstance(resolved_ref := message.reference.resolved, discord.Message)
-            and resolved_ref.webhook_id is not None
-            and not author.bot
-            and not guild_settings.disable_webhook_reply
-        ):
-            await self._handle_reply(message, resolved_ref)
+            logger.debug(f"FindFixResult for message {message.id} in {guild.id=}: {result}")
+
+            if result.fix_found:
+                try:
+                    send_type = await self._send_fixes(
+                        message,
+                        result,
+                        guild_settings=guild_settings,
+                        filesize_limit=ctx.filesize_limit,
+                    )
+                except discord.HTTPException:
+                    logger.warning(f"Failed to send fixes in {channel.id=} in {guild.id=}")
+                    return
+                except Exception as e:
+                    capture_exception(e)
+                    return
+
+                if send_type in {"webhook", "channel"}:
+                    # send_type is only "channel" when delete_original_message_in_threads is
+                    # enabled, this is checked in _send_via_fix_mode.
+                    await self.delete_message_safe(message, channel, guild)
+                elif send_type in {"reply", "resend"}:
+                    await self.suppress_embed_safe(message, channel, guild)
+                    await remove_reaction_safe(message, "⌛", guild.me)
+
+            # If this is a normal message (no embed fix found) replying to a webhook message,
+            # reply to this message containing mention to the original author of the webhook
+            # message.
+            elif (
+                message.reference is not None
+                and isinstance(resolved_ref := message.reference.resolved, discord.Message)
+                and resolved_ref.webhook_id is not None
+                and not author.bot
+                and not guild_settings.disable_webhook_reply
+            ):
+                await self._handle_reply(message, resolved_ref)
 
     async def suppress_embed_safe(
         self,
@@ -1443,35 +1700,40 @@ class FixerCog(commands.Cog):
         if i.channel_id is not None and self._skip_channel(guild_settings, i.channel_id):
             return
 
-        result = await self._find_fixes(
-            message,
-            settings=guild_settings,
+        ctx = RequestContext(
+            guild=i.guild,
+            user_id=message.author.id,
             filesize_limit=DEFAULT_FILESIZE_LIMIT if i.guild is None else i.guild.filesize_limit,
-            extract_media=extract_media,
-            is_ctx_menu=True,
+            guild_settings=guild_settings,
         )
+        with use_request_context(ctx):
+            result = await self._find_fixes(
+                message,
+                settings=guild_settings,
+                filesize_limit=ctx.filesize_limit,
+                extract_media=extract_media,
+                is_ctx_menu=True,
+            )
 
-        if result.fix_found:
-            try:
-                await self._send_fixes(
-                    message,
-                    result,
-                    guild_settings=guild_settings,
-                    filesize_limit=DEFAULT_FILESIZE_LIMIT
-                    if i.guild is None
-                    else i.guild.filesize_limit,
-                    interaction=i,
-                )
-            except discord.Forbidden:
-                logger.warning(f"Failed to send fixes in {i.channel_id=} in {i.guild_id=}")
-        else:
-            await i.followup.send(
-                translator.translate(
-                    "no_fixes_found",
-                    lang=await translator.get_guild_lang(i.guild),
-                    url=message.jump_url,
+            if result.fix_found:
+                try:
+                    await self._send_fixes(
+                        message,
+                        result,
+                        guild_settings=guild_settings,
+                        filesize_limit=ctx.filesize_limit,
+                        interaction=i,
+                    )
+                except discord.Forbidden:
+                    logger.warning(f"Failed to send fixes in {i.channel_id=} in {i.guild_id=}")
+            else:
+                await i.followup.send(
+                    translator.translate(
+                        "no_fixes_found",
+                        lang=await translator.get_guild_lang(i.guild),
+                        url=message.jump_url,
+                    )
                 )
-            )
 
     async def fix_embed(self, i: Interaction, message: discord.Message) -> None:
         await self.base_ctx_menu(i, message, extract_media=False)
@@ -1508,16 +1770,49 @@ class FixerCog(commands.Cog):
             )
         )
 
-        result = await self._find_fixes(
-            mock_message,
-            settings=None,
+        ctx = RequestContext(
+            guild=i.guild,
+            user_id=i.user.id,
             filesize_limit=DEFAULT_FILESIZE_LIMIT if i.guild is None else i.guild.filesize_limit,
-            extract_media=extract_media,
-            is_ctx_menu=is_nsfw_channel,
         )
 
-        if result.fix_found:
+        urls = [span.url for span in iter_url_spans(link) if not span.suppressed]
+        if not extract_media and len(urls) > 1:
+            # Multiple links, reply with the fixed ones in a single message
+            with use_request_context(ctx):
+                fixed_urls = await self.fix_urls(
+                    urls, settings=None, is_nsfw_channel=is_nsfw_channel
+                )
+                guild_lang = await translator.get_guild_lang(i.guild)
+
+            if any(url is not None for url in fixed_urls):
+                # Links that weren't fixed are listed as is, so users can tell which failed
+                lines = [
+                    translator.translate("fix_url_not_fixed", lang=guild_lang, url=url)
+                    if fixed_url is None
+                    else fixed_url
+                    for url, fixed_url in zip(urls, fixed_urls, strict=True)
+                ]
+                await i.followup.send("\n".join(lines))
+            else:
+                await i.followup.send(
+                    translator.translate("no_fixes_found", lang=guild_lang, url=link),
+                    ephemeral=True,
+                )
+            return
+
+        with use_request_context(ctx):
+            result = await self._find_fixes(
+                mock_message,
+                settings=None,
+                filesize_limit=ctx.filesize_limit,
+                extract_media=extract_media,
+                is_ctx_menu=is_nsfw_channel,
+            )
+
             guild_lang = await translator.get_guild_lang(i.guild)
+
+        if result.fix_found:
             response_content = mock_message.content
 
             if extract_media and result.medias:
@@ -1543,7 +1838,6 @@ class FixerCog(commands.Cog):
             else:
                 await i.followup.send(response_content)
         else:
-            guild_lang = await translator.get_guild_lang(i.guild)
             await i.followup.send(
                 translator.translate("no_fixes_found", lang=guild_lang, url=link), ephemeral=True
             )
@@ -72,6 +72,7 @@ class SettingsCog(commands.Cog):
             )
             if vxreddit_fix is None:
                 await GuildFixMethod.create(guild_id=guild_id, domain_id=DomainId.REDDIT, fix_id=7)
+                GuildFixMethod.invalidate_cache(guild_id)
 
         settings.disabled_domains = list(set(settings.disabled_domains))
         settings.disabled_fixes = []
@@ -254,6 +255,7 @@ class SettingsCog(commands.Cog):
         await GuildFixMethod.filter(guild_id=i.guild.id).delete()
         for domain_id, fix_id in fix_methods:
             await GuildFixMethod.create(guild_id=i.guild.id, domain_id=domain_id, fix_id=fix_id)
+        GuildFixMethod.invalidate_cache(i.guild.id)
 
         await i.followup.send(translator.translate("import_done", lang=lang), ephemeral=True)
 
@@ -16,6 +16,9 @@ class Settings(BaseSettings):
     proxy_url: str | None = None
     heartbeat_url: str | None = None
     pixiv_session_id: str | None = None
+    resolve_short_links: bool = False
+    fixed_message_retention_days: int = 90
+    fixed_message_purge_batch_size: int = 1000
 
     @property
     def pixiv_headers(self) -> dict[str, str]:
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import contextlib
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from embed_fixer.models import GuildSettings, UserSettings
+from embed_fixer.utils.cache import MISSING, Missing
+
+if TYPE_CHECKING:
+    import asyncio
+    from collections.abc import Iterator
+
+    import discord
+
+    from embed_fixer.fixes import DomainId
+
+
+class RequestContext:
+    """Lookups shared by every helper handling one message or interaction.
+
+    Each value is resolved at most once per request, so fixing a message costs a fixed
+    number of settings queries no matter how many helpers need them.
+    """
+
+    def __init__(
+        self,
+        *,
+        guild: discord.Guild | None,
+        user_id: int,
+        filesize_limit: int,
+        guild_settings: GuildSettings | Missing | None = MISSING,
+    ) -> None:
+        self.guild = guild
+        self.user_id = user_id
+        self.filesize_limit = filesize_limit
+        self._guild_settings = guild_settings
+        self._user_settings: UserSettings | Missing | None = MISSING
+        self._guild_lang: str | None = None
+        self.posts: dict[tuple[DomainId, str], asyncio.Task[Any]] = {}
+        """Post fetches by `(DomainId, post ID)`, shared by NSFW checks and media extraction."""
+
+    def is_for_guild(self, guild: discord.Guild) -> bool:
+        return self.guild is not None and self.guild.id == guild.id
+
+    async def get_guild_settings(self) -> GuildSettings | None:
+        if self._guild_settings is MISSING:
+            if self.guild is None:
+                self._guild_settings = None
+            else:
+                self._guild_settings, _ = await GuildSettings.get_or_create(id=self.guild.id)
+        return self._guild_settings
+
+    async def get_user_settings(self) -> UserSettings | None:
+        if self._user_settings is MISSING:
+            self._user_settings = await UserSettings.get_or_none(id=self.user_id)
+        return self._user_settings
+
+    async def get_guild_lang(self) -> str:
+        if self.guild is None:
+            msg = "Request context has no guild."
+            raise ValueError(msg)
+
+        if self._guild_lang is None:
+            guild_settings = await self.get_guild_settings()
+            lang = None if guild_settings is None else guild_settings.lang
+            self._guild_lang = lang or self.guild.preferred_locale.value
+        return self._guild_lang
+
+
+request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+@contextlib.contextmanager
+def use_request_context(ctx: RequestContext) -> Iterator[RequestContext]:
+    token = request_context.set(ctx)
+    try:
+        yield ctx
+    finally:
+        request_context.reset(token)
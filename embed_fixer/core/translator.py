@@ -9,6 +9,7 @@ from discord import app_commands
 from loguru import logger
 
 from ..models import GuildSettings, UserSettings
+from .context import request_context
 
 if TYPE_CHECKING:
     import discord
@@ -46,6 +47,10 @@ class Translator:
     async def get_guild_lang(guild: discord.Guild | None) -> str:
         lang = DEFAULT_LANG
         if guild is not None:
+            ctx = request_context.get()
+            if ctx is not None and ctx.is_for_guild(guild):
+                return await ctx.get_guild_lang()
+
             guild_settings, _ = await GuildSettings.get_or_create(id=guild.id)
             lang = guild_settings.lang or guild.preferred_locale.value
         return lang
@@ -1,7 +1,14 @@
+from __future__ import annotations
+
 import re
+import string
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Final
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Final, Self
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 EMBEDEZ_NAME = "EmbedEZ"
 EMBEDEZ_REPO_URL = "https://embedez.com"
@@ -54,9 +61,15 @@ class FixMethod:
 class Website:
     pattern: str
     skip_method_ids: list[int] | None = None
+    short_link: bool = False
+    """Whether the website's URLs are share or short links that redirect to a post."""
+
+    @cached_property
+    def regex(self) -> re.Pattern[str]:
+        return re.compile(self.pattern)
 
     def match(self, url: str) -> bool:
-        return re.match(self.pattern, url) is not None
+        return self.regex.match(url) is not None
 
 
 @dataclass(kw_only=True)
@@ -67,18 +80,28 @@ class Domain:
     fix_methods: list[FixMethod]
     enabled_by_default: bool = True
 
-    @property
+    @cached_property
     def default_fix_method(self) -> FixMethod | None:
         if not self.fix_methods:
             return None
 
         return next((method for method in self.fix_methods if method.default), self.fix_methods[0])
 
+    @cached_property
+    def _fix_method_indexes(self) -> dict[int, int]:
+        """Maps each fix method ID to its index in `fix_methods`."""
+        return {method.id: i for i, method in enumerate(self.fix_methods)}
+
     def get_fix_method(self, fix_id: int) -> FixMethod | None:
-        for method in self.fix_methods:
-            if method.id == fix_id:
-                return method
-        return None
+        index = self._fix_method_indexes.get(fix_id)
+        return None if index is None else self.fix_methods[index]
+
+    def get_next_fix_method(self, fix_id: int) -> FixMethod | None:
+        """Return the fix method after `fix_id`, wrapping around. None if only one exists."""
+        index = self._fix_method_indexes.get(fix_id)
+        if index is None or len(self.fix_methods) <= 1:
+            return None
+        return self.fix_methods[(index + 1) % len(self.fix_methods)]
 
 
 DOMAINS: Final[list[Domain]] = [
@@ -139,9 +162,10 @@ DOMAINS: Final[list[Domain]] = [
         id=DomainId.TIKTOK,
         name="TikTok",
         websites=[
-            Website(r"https://(www.)?tiktok.com/(t/\w+|@[\w.]+/video/\d+)/?"),
-            Website(r"https://vm.tiktok.com/\w+/?"),
-            Website(r"https://vt.tiktok.com/\w+/?"),
+            Website(r"https://(www.)?tiktok.com/t/\w+/?", short_link=True),
+            Website(r"https://(www.)?tiktok.com/@[\w.]+/video/\d+/?"),
+            Website(r"https://vm.tiktok.com/\w+/?", short_link=True),
+            Website(r"https://vt.tiktok.com/\w+/?", short_link=True),
         ],
         fix_methods=[
             FixMethod(
@@ -172,7 +196,7 @@ DOMAINS: Final[list[Domain]] = [
         name="Reddit",
         websites=[
             Website(r"https://(www.|old.)?reddit.com/r/[\w]+/comments/[\w]+/[\w]+/?"),
-            Website(r"https://(www.|old.)?reddit.com/r/[\w]+/s/[\w]+/?"),
+            Website(r"https://(www.|old.)?reddit.com/r/[\w]+/s/[\w]+/?", short_link=True),
             Website(r"https://(www.|old.)?reddit.com/user/[\w]+/comments/[\w]+/[\w]+/?"),
         ],
         fix_methods=[
@@ -334,9 +358,9 @@ DOMAINS: Final[list[Domain]] = [
         id=DomainId.FACEBOOK,
         name="Facebook",
         websites=[
-            Website(r"https://(www.)?facebook.com/share/r/[\w]+/?"),
+            Website(r"https://(www.)?facebook.com/share/r/[\w]+/?", short_link=True),
             Website(r"https://(www.)?facebook.com/reel/\d+/?"),
-            Website(r"https://(www.)?facebook.com/share/v/[\w]+/?"),
+            Website(r"https://(www.)?facebook.com/share/v/[\w]+/?", short_link=True),
             Website(r"https://(www.)?facebook.com/(.*)", skip_method_ids=[15]),
         ],
         fix_methods=[
@@ -367,7 +391,7 @@ DOMAINS: Final[list[Domain]] = [
         name="Bilibili",
         websites=[
             Website(r"https://(www.|m.)?bilibili.com/video/[\w]+/?"),
-            Website(r"https://(www.)?b23.tv/[\w]+/?"),
+            Website(r"https://(www.)?b23.tv/[\w]+/?", short_link=True),
         ],
         fix_methods=[
             FixMethod(
@@ -541,3 +565,159 @@ DOMAINS: Final[list[Domain]] = [
         enabled_by_default=False,
     ),
 ]
+
+
+def _website_host(pattern: str) -> str:
+    """Return the host part of a `Website` pattern, e.g. `(www.)?x.com`."""
+    pattern = pattern.removeprefix("https://")
+    depth = 0
+    for i, char in enumerate(pattern):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "/" and depth == 0:
+            return pattern[:i]
+    return pattern
+
+
+_HOST_CHARS: Final[frozenset[str]] = frozenset(string.ascii_lowercase + string.digits + ".-")
+
+
+def _expand_literal(pattern: str) -> str | None:
+    """Return the text matched by a pattern made of host characters and escaped dots."""
+    text = pattern.replace("\\.", ".")
+    return text if set(text) <= _HOST_CHARS else None
+
+
+def _expand_hosts(pattern: str) -> set[str] | None:
+    """Return every host a `Website` pattern can match, or `None` if they can't be listed.
+
+    Only the syntax used in host parts is supported: host characters, escaped dots and
+    alternation groups, optionally followed by `?`.
+    """
+    pattern = pattern.removeprefix("https://")
+    hosts = {""}
+    i = 0
+    while i < len(pattern) and pattern[i] != "/":
+        if pattern[i] == "(":
+            end = pattern.find(")", i)
+            group = pattern[i + 1 : end]
+            i = end + 1
+            optional = pattern[i : i + 1] == "?"
+            i += optional
+
+            if group.startswith("/"):
+                # Path group right after the host, e.g. pixiv's `(/[a-zA-Z]+)?`
+                if optional and pattern[i : i + 1] not in {"", "/"}:
+                    return None
+                break
+
+            alternatives = [_expand_literal(alt) for alt in group.split("|")]
+            if "(" in group or None in alternatives:
+                return None
+            hosts = {host + alt for host in hosts for alt in alternatives if alt is not None} | (
+                hosts if optional else set()
+            )
+            continue
+
+        literal_end = i + 2 if pattern[i] == "\\" else i + 1
+        literal = _expand_literal(pattern[i:literal_end])
+        if literal is None:
+            return None
+        hosts = {host + literal for host in hosts}
+        i = literal_end
+    return hosts
+
+
+def _build_website_index(
+    domains: Iterable[Domain],
+) -> dict[str, list[tuple[Domain, Website]]] | None:
+    index: dict[str, list[tuple[Domain, Website]]] = {}
+    for domain in domains:
+        for website in domain.websites:
+            hosts = _expand_hosts(website.pattern)
+            if hosts is None:
+                return None
+            for host in hosts:
+                index.setdefault(host, []).append((domain, website))
+    return index
+
+
+class WebsiteMatcher:
+    """Finds the website a clean URL belongs to among some domains, in `DOMAINS` order.
+
+    Only the websites registered for the URL's host are tried. The result is the same as
+    calling `Website.match` on every website, except that unescaped dots in patterns
+    only match a literal dot.
+    """
+
+    def __init__(self, domains: Iterable[Domain]) -> None:
+        self.domains = tuple(domains)
+        self._index = _build_website_index(self.domains)
+        """Maps each host to the `(Domain, Website)` pairs that can match it.
+
+        `None` if the hosts of a pattern can't be listed, in which case every website is
+        tried.
+        """
+
+    def match(self, url: str) -> tuple[Domain, Website] | None:
+        if self._index is None:
+            candidates = [(d, w) for d in self.domains for w in d.websites]
+        elif url.startswith("https://"):
+            candidates = self._index.get(url[8:].partition("/")[0], [])
+        else:
+            return None
+        return next(((d, w) for d, w in candidates if w.match(url)), None)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class DomainRegistry:
+    """Lookups over some domains, built once so callers never scan the domain list."""
+
+    domains: tuple[Domain, ...]
+    host_pattern: re.Pattern[str]
+    """Matches every host a website of the domains can match, used to pre-filter messages."""
+    website_matcher: WebsiteMatcher
+    by_id: tuple[Domain | None, ...]
+    """Domains indexed by `DomainId` value, `None` for unused values."""
+
+    @classmethod
+    def build(cls, domains: Iterable[Domain]) -> Self:
+        domains = tuple(domains)
+        by_id: list[Domain | None] = [None] * (max(d.id for d in domains) + 1)
+
+        for domain in domains:
+            if by_id[domain.id] is not None:
+                msg = f"Duplicate domain ID: {domain.id!r}"
+                raise ValueError(msg)
+            by_id[domain.id] = domain
+
+            # Fill cached lookups now rather than while handling the first messages
+            _ = domain.default_fix_method, domain._fix_method_indexes
+            for website in domain.websites:
+                _ = website.regex
+
+        return cls(
+            domains=domains,
+            host_pattern=re.compile(
+                "|".join(
+                    dict.fromkeys(_website_host(w.pattern) for d in domains for w in d.websites)
+                )
+            ),
+            website_matcher=WebsiteMatcher(domains),
+            by_id=tuple(by_id),
+        )
+
+    def get_domain(self, domain_id: int) -> Domain | None:
+        return self.by_id[domain_id] if 0 <= domain_id < len(self.by_id) else None
+
+
+REGISTRY: Final = DomainRegistry.build(DOMAINS)
+"""Lookups over `DOMAINS`."""
+
+
+@lru_cache(maxsize=1024)
+def get_website_matcher(domain_ids: frozenset[DomainId]) -> WebsiteMatcher:
+    """Return a matcher for the given domains, shared by all guilds enabling the same ones."""
+    return WebsiteMatcher(d for d in REGISTRY.domains if d.id in domain_ids)
@@ -1,20 +1,42 @@
 # pyright: reportAssignmentType=false
 from __future__ import annotations
 
+import asyncio
+import bisect
 import contextlib
-from typing import TYPE_CHECKING, Any, ClassVar, Self
+import json
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, ClassVar, Final, Self
 
+import discord
 import pydantic
-from tortoise import fields
+from loguru import logger
+from tortoise import fields, timezone
 from tortoise.exceptions import IntegrityError
+from tortoise.functions import Count, Max, Min
 from tortoise.models import Model
 
-from embed_fixer.fixes import DomainId
+from embed_fixer.fixes import DOMAINS, DomainId, WebsiteMatcher, get_website_matcher
 from embed_fixer.settings import FixMode
+from embed_fixer.utils.cache import MISSING, TTLCache
 
 if TYPE_CHECKING:
+    import datetime
     from collections.abc import Iterable
 
+    from embed_fixer.utils.cache import CacheInfo
+
+SETTINGS_CACHE_SIZE: Final[int] = 10_000
+SETTINGS_CACHE_TTL: Final[int] = 300  # seconds
+IGNORE_ME_COMPACT_THRESHOLD: Final[int] = 100_000
+"""Above this many ignored users, `IgnoreMe` keeps its IDs in a sorted array instead of a set."""
+FIXED_MESSAGE_FLUSH_ROWS: Final[int] = 100
+"""Queued `FixedMessage` records that trigger a flush without waiting for the next interval."""
+FIXED_MESSAGE_MAX_PENDING: Final[int] = 10_000
+"""Queued `FixedMessage` records kept while writes fail, the oldest are dropped above this."""
+
 
 class SettingsTable(Model):
     id = fields.BigIntField(pk=True, generated=False)
@@ -25,24 +47,51 @@ class SettingsTable(Model):
 
 
 class BaseSettings(pydantic.BaseModel):
+    """Settings stored as a JSON blob, cached in-process.
+
+    Cached instances are shared between callers, so changes must be persisted with `save`,
+    which also updates the cache, or drops the entry if the write fails. Other processes
+    see the change once the entry expires.
+    """
+
     id: int
     _table_class: ClassVar[type[SettingsTable]]
+    _cache: ClassVar[TTLCache[int, Any]]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._cache = TTLCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL)
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        return cls._cache.info()
 
     @classmethod
     async def get_or_create(cls, id: int) -> tuple[Self, bool]:  # noqa: A002
+        cached: Self | None = cls._cache.get(id)
+        if cached is not None:
+            return cached, False
+
         obj, created = await cls._table_class.get_or_create(id=id)
         if created or not obj.data:
             settings = cls(id=id)
             await settings.save()
             return settings, created
-        return cls(id=id, **obj.data), created
+
+        settings = cls(id=id, **obj.data)
+        cls._cache.set(id, settings)
+        return settings, created
 
     @classmethod
     async def get_or_none(cls, id: int) -> Self | None:  # noqa: A002
+        cached = cls._cache.get(id, MISSING)
+        if cached is not MISSING:
+            return cached
+
         obj = await cls._table_class.get_or_none(id=id)
-        if obj is None or not obj.data:
-            return None
-        return cls(id=id, **obj.data)
+        settings = None if obj is None or not obj.data else cls(id=id, **obj.data)
+        cls._cache.set(id, settings)
+        return settings
 
     @classmethod
     async def create(cls, id: int) -> Self:  # noqa: A002
@@ -53,31 +102,184 @@ class BaseSettings(pydantic.BaseModel):
     @classmethod
     async def delete(cls, id: int) -> None:  # noqa: A002
         await cls._table_class.filter(id=id).delete()
-
-    async def save(self, *, update_fields: Iterable[str] | None = None) -> None:  # noqa: ARG002
-        obj, _ = await self.__class__._table_class.get_or_create(id=self.id)
-        obj.data = self.model_dump(exclude={"id"})
-        await obj.save()
+        cls._cache.pop(id)
+
+    async def save(self, *, update_fields: Iterable[str] | None = None) -> None:
+        """Upsert the settings in a single statement.
+
+        If `update_fields` is given and the row already exists, only those keys of the JSON
+        blob are rewritten.
+        """
+        try:
+            await self._write(update_fields)
+        except BaseException:
+            # Callers change the cached instance in place before saving, so drop it rather
+            # than keep serving changes that never reached the database
+            self.__class__._cache.pop(self.id)
+            raise
+
+        self.__class__._cache.set(self.id, self)
+
+    async def _write(self, update_fields: Iterable[str] | None) -> None:
+        table_class = self.__class__._table_class
+        data = self.model_dump(mode="json", exclude={"id"})
+        conn = table_class._meta.db
+        dialect = conn.capabilities.dialect
+
+        if dialect not in {"sqlite", "postgres"}:
+            obj, _ = await table_class.get_or_create(id=self.id)
+            obj.data = data
+            await obj.save()
+        else:
+            partial = (
+                None if update_fields is None else {field: data[field] for field in update_fields}
+            )
+            query, values = self._build_upsert_query(
+                table_class._meta.db_table, dialect, data=data, partial=partial
+            )
+            await conn.execute_query(query, values)
+
+    def _build_upsert_query(
+        self, table: str, dialect: str, *, data: dict[str, Any], partial: dict[str, Any] | None
+    ) -> tuple[str, list[Any]]:
+        values: list[Any] = [self.id, json.dumps(data)]
+
+        if dialect == "postgres":
+            update = "EXCLUDED.data"
+            if partial is not None:
+                update = f'"{table}".data || $3::jsonb'
+                values.append(json.dumps(partial))
+            query = (
+                f'INSERT INTO "{table}" (id, data) VALUES ($1, $2::jsonb) '  # noqa: S608
+                f"ON CONFLICT (id) DO UPDATE SET data = {update}"
+            )
+            return query, values
+
+        update = "excluded.data"
+        if partial is not None:
+            # json_set instead of json_patch, which would drop keys whose value is null
+            paths = ", ".join("?, json(?)" for _ in partial)
+            update = f'json_set("{table}".data, {paths})' if partial else f'"{table}".data'
+            for field, value in partial.items():
+                values.extend((f'$."{field}"', json.dumps(value)))
+        query = (
+            f'INSERT INTO "{table}" (id, data) VALUES (?, ?) '  # noqa: S608
+            f"ON CONFLICT (id) DO UPDATE SET data = {update}"
+        )
+        return query, values
 
 
 class IgnoreMe(Model):
+    """Users who opted out of having their messages fixed.
+
+    Membership checks are answered from an in-memory copy of the table loaded by `load`,
+    which `add` and `remove` keep up to date. Other processes sharing the database pick up
+    changes through `refresh`.
+    """
+
     id = fields.BigIntField(pk=True, generated=False)
 
+    _loaded: ClassVar[bool] = False
+    _ids: ClassVar[set[int]] = set()
+    _compact_ids: ClassVar[array[int] | None] = None
+    _fingerprint: ClassVar[tuple[int, int | None, int | None]] = (0, None, None)
+    """Row count and ID range of the table as of the in-memory IDs."""
+    _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    """Held while loading or writing through, so a reload can't overwrite a newer change."""
+
     class Meta:
         table = "ignore_me"
 
+    @classmethod
+    async def _get_fingerprint(cls) -> tuple[int, int | None, int | None]:
+        rows = await cls.annotate(
+            count=Count("id"), max_id=Max("id"), min_id=Min("id")
+        ).values_list("count", "max_id", "min_id")
+        return rows[0] if rows else (0, None, None)
+
+    @classmethod
+    def _memory_fingerprint(cls) -> tuple[int, int | None, int | None]:
+        if cls._compact_ids is not None:
+            ids = cls._compact_ids
+            return (len(ids), ids[-1], ids[0]) if ids else (0, None, None)
+        return len(cls._ids), max(cls._ids, default=None), min(cls._ids, default=None)
+
+    @classmethod
+    async def load(cls) -> None:
+        """Load all ignored user IDs into memory."""
+        async with cls._lock:
+            await cls._load()
+
+    @classmethod
+    async def _load(cls) -> None:
+        fingerprint = await cls._get_fingerprint()
+        ids: list[int] = await cls.all().values_list("id", flat=True)
+
+        if len(ids) > IGNORE_ME_COMPACT_THRESHOLD:
+            cls._ids = set()
+            cls._compact_ids = array("q", sorted(ids))
+        else:
+            cls._ids = set(ids)
+            cls._compact_ids = None
+
+        cls._fingerprint = fingerprint
+        cls._loaded = True
+
+    @classmethod
+    async def refresh(cls) -> None:
+        """Reload the in-memory IDs if the table was changed by another process.
+
+        Compares the row count and ID range, which is cheap but can miss a removal and an
+        insertion that cancel out; those are picked up by the next change.
+        """
+        async with cls._lock:
+            if await cls._get_fingerprint() != cls._fingerprint:
+                await cls._load()
+
+    @classmethod
+    def _add_to_memory(cls, id: int) -> None:  # noqa: A002
+        if cls._compact_ids is None:
+            cls._ids.add(id)
+        elif not cls._compact_contains(id):
+            bisect.insort(cls._compact_ids, id)
+
+    @classmethod
+    def _remove_from_memory(cls, id: int) -> None:  # noqa: A002
+        if cls._compact_ids is None:
+            cls._ids.discard(id)
+        elif cls._compact_contains(id):
+            del cls._compact_ids[bisect.bisect_left(cls._compact_ids, id)]
+
+    @classmethod
+    def _compact_contains(cls, id: int) -> bool:  # noqa: A002
+        assert cls._compact_ids is not None
+        index = bisect.bisect_left(cls._compact_ids, id)
+        return index < len(cls._compact_ids) and cls._compact_ids[index] == id
+
     @classmethod
     async def add(cls, id: int) -> None:  # noqa: A002
-        with contextlib.suppress(IntegrityError):
-            await cls.create(id=id)
+        async with cls._lock:
+            with contextlib.suppress(IntegrityError):
+                await cls.create(id=id)
+            cls._add_to_memory(id)
+            # Derived from memory so the next refresh doesn't reload for this change, while
+            # still noticing changes made by other processes
+            cls._fingerprint = cls._memory_fingerprint()
 
     @classmethod
     async def remove(cls, id: int) -> None:  # noqa: A002
-        await cls.filter(id=id).delete()
+        async with cls._lock:
+            await cls.filter(id=id).delete()
+            cls._remove_from_memory(id)
+            cls._fingerprint = cls._memory_fingerprint()
 
     @classmethod
     async def contains(cls, id: int) -> bool:  # noqa: A002
-        return await cls.filter(id=id).exists()
+        if not cls._loaded:
+            return await cls.filter(id=id).exists()
+        if cls._compact_ids is None:
+            return id in cls._ids
+        return cls._compact_contains(id)
 
     @classmethod
     async def toggle(cls, id: int) -> bool:  # noqa: A002
@@ -89,7 +291,15 @@ class IgnoreMe(Model):
 
 
 class FixedMessage(Model):
-    """A fixed message sent by the bot, used to recognize it and its original author later."""
+    """A fixed message sent by the bot, used to recognize it and its original author later.
+
+    The IDs of all records are kept in memory, loaded by `load`, so events about messages
+    the bot didn't send are dismissed without a query. Records must be created and deleted
+    through `add`, `remove` and `purge` to keep that index accurate.
+
+    `add` only queues the record, which is written in bulk by `flush`. Lookups through
+    `get_known` see queued records, so callers don't have to wait for the write.
+    """
 
     id = fields.BigIntField(pk=True, generated=False)
     guild_id = fields.BigIntField()
@@ -98,9 +308,174 @@ class FixedMessage(Model):
     send_type = fields.CharField(max_length=16)
     created_at = fields.DatetimeField(auto_now_add=True, db_index=True)
 
+    _loaded: ClassVar[bool] = False
+    _ids: ClassVar[array[int]] = array("q")
+    """Sorted; snowflakes grow over time so new IDs are almost always appended."""
+    _pending: ClassVar[dict[int, FixedMessage]] = {}
+    """Records queued by `add` that haven't been written yet, oldest first."""
+    _dropped: ClassVar[int] = 0
+    """Queued records dropped since the last flush because the queue was full."""
+    _flush_failed: ClassVar[bool] = False
+    _flush_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+
     class Meta:
         table = "fixed_messages"
 
+    @classmethod
+    async def load(cls) -> None:
+        ids: list[int] = await cls.all().order_by("id").values_list("id", flat=True)
+        cls._ids = array("q", ids)
+        cls._loaded = True
+
+    @classmethod
+    def is_known(cls, id: int) -> bool:  # noqa: A002
+        """Whether `id` may have a record, always `True` before `load` has run."""
+        if not cls._loaded:
+            return True
+        index = bisect.bisect_left(cls._ids, id)
+        return index < len(cls._ids) and cls._ids[index] == id
+
+    @classmethod
+    async def get_known(cls, id: int) -> FixedMessage | None:  # noqa: A002
+        if not cls.is_known(id):
+            return None
+        pending = cls._pending.get(id)
+        if pending is not None:
+            return pending
+        return await cls.get_or_none(id=id)
+
+    @classmethod
+    def add(
+        cls,
+        *,
+        id: int,  # noqa: A002
+        guild_id: int,
+        channel_id: int,
+        author_id: int,
+        send_type: str,
+    ) -> None:
+        """Queue a record for the next `flush`, which runs early once the queue is full.
+
+        While flushes fail, the queue is capped at `FIXED_MESSAGE_MAX_PENDING` records and
+        no early flushes are started, leaving retries to the periodic flush.
+        """
+        cls._pending[id] = cls(
+            id=id,
+            guild_id=guild_id,
+            channel_id=channel_id,
+            author_id=author_id,
+            send_type=send_type,
+            created_at=timezone.now(),
+        )
+        if cls._loaded and not cls.is_known(id):
+            bisect.insort(cls._ids, id)
+
+        while len(cls._pending) > FIXED_MESSAGE_MAX_PENDING:
+            cls._drop_oldest()
+
+        if (
+            len(cls._pending) >= FIXED_MESSAGE_FLUSH_ROWS
+            and not cls._flush_failed
+            and not cls._flush_lock.locked()
+        ):
+            asyncio.create_task(cls._flush_in_background())
+
+    @classmethod
+    def _drop_oldest(cls) -> None:
+        id_ = next(iter(cls._pending))
+        del cls._pending[id_]
+        cls._dropped += 1
+        if cls._loaded:
+            index = bisect.bisect_left(cls._ids, id_)
+            if index < len(cls._ids) and cls._ids[index] == id_:
+                del cls._ids[index]
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Write queued records in one statement, returning how many were written.
+
+        Records stay queued if the write fails, so the next flush retries them.
+        """
+        async with cls._flush_lock:
+            if cls._dropped:
+                logger.warning(
+                    f"Dropped {cls._dropped} fixed message records, the write queue was full"
+                )
+                cls._dropped = 0
+
+            rows = list(cls._pending.values())
+            if not rows:
+                return 0
+
+            try:
+                await FixedMessage.bulk_create(rows, ignore_conflicts=True)
+            except Exception:
+                cls._flush_failed = True
+                raise
+            cls._flush_failed = False
+
+            for row in rows:
+                if cls._pending.get(row.id) is row:
+                    del cls._pending[row.id]
+            return len(rows)
+
+    @classmethod
+    async def _flush_in_background(cls) -> None:
+        try:
+            await cls.flush()
+        except Exception:
+            logger.exception("Failed to flush fixed message records")
+
+    @classmethod
+    async def remove(cls, ids: Iterable[int]) -> None:
+        known = {id_ for id_ in ids if cls.is_known(id_)}
+        if not known:
+            return
+
+        # Wait for an in-flight flush so its rows can't be inserted after this delete
+        async with cls._flush_lock:
+            unsaved = {id_ for id_ in known if cls._pending.pop(id_, None) is not None}
+            if known - unsaved:
+                await cls.filter(id__in=known - unsaved).delete()
+
+            if cls._loaded:
+                for id_ in known:
+                    # A concurrent remove or purge may have dropped it during the delete
+                    index = bisect.bisect_left(cls._ids, id_)
+                    if index < len(cls._ids) and cls._ids[index] == id_:
+                        del cls._ids[index]
+
+    @classmethod
+    async def purge(cls, cutoff: datetime.datetime, *, batch_size: int, delay: float) -> int:
+        """Delete records of messages sent before `cutoff`, returning how many were deleted.
+
+        Rows are deleted `batch_size` at a time by primary key range, sleeping `delay`
+        seconds between batches so other writes aren't blocked for the whole purge.
+        """
+        # Filter on the snowflake rather than created_at so the in-memory index stays in sync
+        min_id = discord.utils.time_snowflake(cutoff)
+        deleted = 0
+
+        while True:
+            ids: list[int] = (
+                await cls.filter(id__lt=min_id)
+                .order_by("id")
+                .limit(batch_size)
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                return deleted
+
+            # Trim the index under the same lock as remove so their updates can't interleave
+            async with cls._flush_lock:
+                deleted += await cls.filter(id__gte=ids[0], id__lte=ids[-1]).delete()
+                if cls._loaded:
+                    del cls._ids[: bisect.bisect_right(cls._ids, ids[-1])]
+
+            if len(ids) < batch_size:
+                return deleted
+            await asyncio.sleep(delay)
+
 
 class GuildSettingsTable(SettingsTable):
     class Meta:
@@ -161,6 +536,56 @@ class GuildSettings(BaseSettings):
             values["fix_mode"] = FixMode.REPLY
         return values
 
+    @cached_property
+    def snapshot(self) -> GuildSettingsSnapshot:
+        """Set-based view of the settings for hot-path checks, rebuilt after `save`."""
+        return GuildSettingsSnapshot.from_settings(self)
+
+    async def save(self, *, update_fields: Iterable[str] | None = None) -> None:
+        with contextlib.suppress(AttributeError):
+            del self.snapshot
+        await super().save(update_fields=update_fields)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class GuildSettingsSnapshot:
+    """Immutable copy of the `GuildSettings` lists used on every message, as frozensets."""
+
+    enabled_domains: frozenset[DomainId]
+    """Domains whose links are fixed, after applying the guild's enabled/disabled lists."""
+    website_matcher: WebsiteMatcher
+    """Matches URLs against the websites of `enabled_domains` only."""
+    enable_fix_channels: frozenset[int]
+    disable_fix_channels: frozenset[int]
+    extract_media_channels: frozenset[int]
+    disable_image_spoilers: frozenset[int]
+    show_post_content_channels: frozenset[int]
+    whitelist_role_ids: frozenset[int]
+
+    @classmethod
+    def from_settings(cls, settings: GuildSettings) -> Self:
+        disabled, enabled = set(settings.disabled_domains), set(settings.enabled_domains)
+        enabled_domains = frozenset(
+            d.id
+            for d in DOMAINS
+            if d.id not in disabled and (d.enabled_by_default or d.id in enabled)
+        )
+        return cls(
+            enabled_domains=enabled_domains,
+            website_matcher=get_website_matcher(enabled_domains),
+            enable_fix_channels=frozenset(settings.enable_fix_channels),
+            disable_fix_channels=frozenset(settings.disable_fix_channels),
+            extract_media_channels=frozenset(settings.extract_media_channels),
+            disable_image_spoilers=frozenset(settings.disable_image_spoilers),
+            show_post_content_channels=frozenset(settings.show_post_content_channels),
+            whitelist_role_ids=frozenset(settings.whitelist_role_ids),
+        )
+
+    def skip_channel(self, channel_id: int) -> bool:
+        if self.enable_fix_channels and channel_id not in self.enable_fix_channels:
+            return True
+        return channel_id in self.disable_fix_channels
+
 
 # Deprecated, only for migration, new fields should be added to GuildSettings
 class GuildSettingsOld(Model):
@@ -201,3 +626,45 @@ class GuildFixMethod(Model):
     class Meta:
         table = "guild_fixes"
         unique_together = ("guild_id", "domain_id", "fix_id")
+
+    _cache: ClassVar[TTLCache[int, dict[DomainId, int]]] = TTLCache(
+        maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL
+    )
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        return cls._cache.info()
+
+    @classmethod
+    def invalidate_cache(cls, guild_id: int) -> None:
+        cls._cache.pop(guild_id)
+
+    @classmethod
+    async def get_fix_ids(cls, guild_id: int) -> dict[DomainId, int]:
+        """Return the fix method ID chosen by the guild for each domain, loaded in one query.
+
+        The returned mapping is shared with the cache and must not be mutated.
+        """
+        fix_ids = cls._cache.get(guild_id)
+        if fix_ids is not None:
+            return fix_ids
+
+        rows = await cls.filter(guild_id=guild_id).order_by("id").values_list("domain_id", "fix_id")
+        fix_ids = {}
+        for domain_id, fix_id in rows:
+            fix_ids.setdefault(DomainId(domain_id), fix_id)
+
+        cls._cache.set(guild_id, fix_ids)
+        return fix_ids
+
+    @classmethod
+    async def set_fix_id(cls, guild_id: int, domain_id: DomainId, fix_id: int) -> None:
+        await cls.update_or_create(
+            guild_id=guild_id, domain_id=domain_id, defaults={"fix_id": fix_id}
+        )
+        cls.invalidate_cache(guild_id)
+
+    @classmethod
+    async def remove_fix_id(cls, guild_id: int, domain_id: DomainId) -> None:
+        await cls.filter(guild_id=guild_id, domain_id=domain_id).delete()
+        cls.invalidate_cache(guild_id)
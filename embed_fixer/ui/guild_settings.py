@@ -7,7 +7,7 @@ import discord
 from discord import ButtonStyle, ChannelType, SelectOption
 
 from embed_fixer.core.translator import DEFAULT_LANG, translator
-from embed_fixer.fixes import DOMAINS, DomainId
+from embed_fixer.fixes import DOMAINS, REGISTRY, DomainId
 from embed_fixer.models import GuildFixMethod, GuildSettings
 from embed_fixer.settings import GuildSetting
 from embed_fixer.ui.common import FixModeSelector, SettingsSection
@@ -186,7 +186,7 @@ class GuildSettingsView(ui.LayoutView):
             msg = "Domain ID is not set."
             raise ValueError(msg)
 
-        domain = next((domain for domain in DOMAINS if domain.id == self.domain_id), None)
+        domain = REGISTRY.get_domain(self.domain_id)
         if domain is None:
             msg = f"Invalid domain ID: {self.domain_id}"
             raise ValueError(msg)
@@ -234,12 +234,12 @@ class GuildSettingsView(ui.LayoutView):
 
         await i.response.edit_message(view=self)
 
-    async def _get_current_fix(self) -> GuildFixMethod | None:
+    async def _get_current_fix_id(self) -> int | None:
         if self.domain_id is None:
             msg = "Domain ID is not set."
             raise ValueError(msg)
 
-        return await GuildFixMethod.get_or_none(guild_id=self.guild_id, domain_id=self.domain_id)
+        return (await GuildFixMethod.get_fix_ids(self.guild_id)).get(self.domain_id)
 
     async def _get_domain_text_display(self) -> discord.ui.TextDisplay:
         if self.domain_id is None:
@@ -247,8 +247,8 @@ class GuildSettingsView(ui.LayoutView):
             raise ValueError(msg)
 
         domain = self.domain
-        db_fix = await self._get_current_fix()
-        fix = domain.default_fix_method if db_fix is None else domain.get_fix_method(db_fix.fix_id)
+        fix_id = await self._get_current_fix_id()
+        fix = domain.default_fix_method if fix_id is None else domain.get_fix_method(fix_id)
 
         if fix is None:
             fix = domain.default_fix_method
@@ -425,10 +425,7 @@ class GuildSettingsView(ui.LayoutView):
             domain_selector = DomainSelector(self.domain_id or DomainId.TWITTER)
             container.add_item(discord.ui.ActionRow(domain_selector, id=DOMAIN_SELECTOR_ROW_ID))
 
-            current = await self._get_current_fix()
-            fix_method_selector = FixMethodSelector(
-                self.domain, None if current is None else current.fix_id
-            )
+            fix_method_selector = FixMethodSelector(self.domain, await self._get_current_fix_id())
             container.add_item(
                 discord.ui.ActionRow(fix_method_selector, id=FIX_METHOD_SELECTOR_ROW_ID)
             )
@@ -629,9 +626,8 @@ class DomainSelector(ui.Select[GuildSettingsView]):
         self.view.domain_id = DomainId(int(self.values[0]))
         self.options = self._get_options(self.view.domain_id)
 
-        current = await self.view._get_current_fix()
         fix_method_selector = FixMethodSelector(
-            self.view.domain, None if current is None else current.fix_id
+            self.view.domain, await self.view._get_current_fix_id()
         )
 
         container = self.view.children[0]
@@ -667,10 +663,11 @@ class FixMethodSelector(ui.Select[GuildSettingsView]):
         )
 
     async def callback(self, i: Interaction) -> None:
-        await GuildFixMethod.update_or_create(
-            guild_id=self.view.guild.id,
-            domain_id=self.view.domain_id,
-            defaults={"fix_id": int(self.values[0])},
+        if self.view.domain_id is None:
+            return
+
+        await GuildFixMethod.set_fix_id(
+            self.view.guild.id, self.view.domain_id, int(self.values[0])
         )
 
         text_display = await self.view._get_domain_text_display()
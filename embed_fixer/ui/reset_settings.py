@@ -29,6 +29,7 @@ class ConfirmButton(ui.Button[ResetSettingsView]):
             return
 
         await GuildFixMethod.filter(guild_id=i.guild.id).delete()
+        GuildFixMethod.invalidate_cache(i.guild.id)
         await GuildSettings.delete(id=i.guild.id)
         await i.response.edit_message(
             embed=DefaultEmbed(title=self.view.translate("reset_done")), view=None
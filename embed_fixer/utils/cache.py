@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Final, NamedTuple, overload
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+
+class Missing(enum.Enum):
+    MISSING = enum.auto()
+
+
+MISSING: Final = Missing.MISSING
+"""Sentinel for cache misses, needed since `None` can be a cached value."""
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.1%} "
+            f"size={self.currsize}/{self.maxsize}"
+        )
+
+
+class TTLCache[K, V]:
+    """A bounded LRU cache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @overload
+    def get(self, key: K) -> V | None: ...
+    @overload
+    def get[D](self, key: K, default: D) -> V | D: ...
+    def get[D](self, key: K, default: D | None = None) -> V | D | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self._misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self._hits, misses=self._misses, maxsize=self.maxsize, currsize=len(self._data)
+        )
+
+
+class SingleFlight[K, V]:
+    """Runs at most one task per key at a time, shared by every caller asking for that key.
+
+    Callers joining a running task get its result or exception. Finished tasks are
+    forgotten, so caching results is left to the caller.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[K, asyncio.Task[V]] = {}
+        self.coalesced = 0
+        """Number of calls that joined a running task instead of starting one."""
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def start(self, key: K, func: Callable[[], Coroutine[Any, Any, V]]) -> asyncio.Task[V]:
+        """Return the running task for `key`, or start one running `func()`."""
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        task = asyncio.create_task(func())
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return task
+
+    async def run(self, key: K, func: Callable[[], Coroutine[Any, Any, V]]) -> V:
+        return await self.join(self.start(key, func))
+
+    @staticmethod
+    async def join[T](task: asyncio.Task[T]) -> T:
+        # Shielded so a cancelled caller doesn't cancel the task for everyone else
+        return await asyncio.shield(task)
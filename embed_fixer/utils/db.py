@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+
+
+async def _get_pragma(conn: BaseDBAsyncClient, name: str) -> int:
+    rows = await conn.execute_query_dict(f"PRAGMA {name}")
+    return rows[0][name]
+
+
+async def _get_sqlite_size(conn: BaseDBAsyncClient) -> int:
+    return await _get_pragma(conn, "page_count") * await _get_pragma(conn, "page_size")
+
+
+async def incremental_vacuum(conn: BaseDBAsyncClient) -> int:
+    """Release free pages of a SQLite database to the OS, returning the bytes reclaimed.
+
+    Only works on databases with incremental auto-vacuum, see
+    `enable_incremental_vacuum`. Does nothing on other databases.
+    """
+    if conn.capabilities.dialect != "sqlite":
+        return 0
+
+    if await _get_pragma(conn, "auto_vacuum") != SQLITE_AUTO_VACUUM_INCREMENTAL:
+        logger.info("Skipping incremental vacuum, the database doesn't use incremental auto-vacuum")
+        return 0
+
+    size_before = await _get_sqlite_size(conn)
+    await conn.execute_script("PRAGMA incremental_vacuum")
+    return size_before - await _get_sqlite_size(conn)
+
+
+async def enable_incremental_vacuum(conn: BaseDBAsyncClient) -> bool:
+    """Switch a SQLite database to incremental auto-vacuum, returning whether it was switched.
+
+    This rewrites the whole database with a full `VACUUM`, which locks it until done, so
+    it is only run on request.
+    """
+    if conn.capabilities.dialect != "sqlite":
+        return False
+    if await _get_pragma(conn, "auto_vacuum") == SQLITE_AUTO_VACUUM_INCREMENTAL:
+        return False
+
+    logger.info("Enabling incremental auto-vacuum, running a full VACUUM")
+    await conn.execute_script(f"PRAGMA auto_vacuum = {SQLITE_AUTO_VACUUM_INCREMENTAL}; VACUUM;")
+    return True
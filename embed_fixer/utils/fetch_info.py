@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import re
 from typing import TYPE_CHECKING, Any, Final
@@ -9,20 +10,47 @@ from loguru import logger
 from pydantic import BaseModel, Field, field_validator
 
 from embed_fixer.core.config import settings
+from embed_fixer.core.context import request_context
+from embed_fixer.fixes import DomainId
+from embed_fixer.utils.cache import MISSING, Missing, SingleFlight, TTLCache
 from embed_fixer.utils.misc import remove_html_tags, replace_domain
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
     import aiohttp
 
+    from embed_fixer.utils.cache import CacheInfo
+
 load_dotenv()
 
 PIXIV_R18_TAG: Final[str] = "R-18"
+PIXIV_AJAX_URL: Final[str] = "https://www.pixiv.net/ajax/illust"
 TWITTER_MEDIA_TYPES = {"photo", "video", "gif"}
+POST_CACHE_SIZE: Final[int] = 1000
+POST_CACHE_TTLS: Final[dict[DomainId, int]] = {  # seconds
+    DomainId.TWITTER: 60 * 5,  # Likes and replies change quickly, shown in embeds
+    DomainId.PIXIV: 60 * 60,
+    DomainId.BLUESKY: 60 * 10,
+    DomainId.KEMONO: 60 * 60,
+}
 
 
 class PostInfoFetcher:
-    def __init__(self, session: aiohttp.ClientSession) -> None:
+    def __init__(
+        self, session: aiohttp.ClientSession, *, speculative_pixiv_pages: bool = True
+    ) -> None:
         self.session = session
+        self.speculative_pixiv_pages = speculative_pixiv_pages
+        """Whether to request Pixiv artwork pages in parallel with the artwork info."""
+        self._inflight: SingleFlight[tuple[DomainId, str], Any] = SingleFlight()
+        """Post fetches in progress by `(DomainId, post ID)`, shared by every message."""
+        self._posts: dict[DomainId, TTLCache[str, Any]] = {
+            domain_id: TTLCache(maxsize=POST_CACHE_SIZE, ttl=ttl)
+            for domain_id, ttl in POST_CACHE_TTLS.items()
+        }
+        """Parsed posts by post ID, so cached posts skip the HTTP cache and validation."""
+        self._request_hits = 0
 
     @staticmethod
     def _extract_pixiv_id(url: str) -> str | None:
@@ -47,6 +75,16 @@ class PostInfoFetcher:
         match = re.search(r"iwara.tv/video/([a-zA-Z0-9]+)", url)
         return match.group(1) if match else None
 
+    @staticmethod
+    def _extract_bluesky_id(url: str) -> str | None:
+        match = re.search(r"bsky.app/profile/([^/]+)/post/(\w+)", url)
+        return f"{match.group(1)}/{match.group(2)}" if match else None
+
+    @staticmethod
+    def _extract_kemono_id(url: str) -> str | None:
+        match = re.search(r"kemono.su/(\w+)/user/(\w+)/post/(\w+)", url)
+        return "/".join(match.groups()) if match else None
+
     @staticmethod
     def _extract_b23_slug(url: str) -> str | None:
         match = re.search(r"b23.tv/([\w]+)", url)
@@ -57,55 +95,113 @@ class PostInfoFetcher:
         match = re.search(r"bilibili.com/video/([\w]+)", url)
         return match.group(1) if match else None
 
+    @property
+    def fetches_saved(self) -> int:
+        """Number of post fetches answered by an earlier or in-flight fetch of the same post."""
+        return self._request_hits + self._inflight.coalesced
+
+    def cache_info(self) -> dict[DomainId, CacheInfo]:
+        return {domain_id: cache.info() for domain_id, cache in self._posts.items()}
+
+    async def _fetch_once[T](
+        self, domain_id: DomainId, post_id: str, fetch: Callable[[], Coroutine[Any, Any, T]]
+    ) -> T:
+        """Fetch a post at most once per request and once at a time across requests.
+
+        Callers asking for a post that is already being fetched, by any message, await the
+        same task and get its result or exception. Fetched posts are cached for the
+        domain's TTL in `POST_CACHE_TTLS`.
+        """
+        key = (domain_id, post_id)
+        ctx = request_context.get()
+
+        task: asyncio.Task[T] | None = None if ctx is None else ctx.posts.get(key)
+        if task is None:
+            cache = self._posts[domain_id]
+            cached = cache.get(post_id, MISSING)
+            if cached is not MISSING:
+                return cached
+
+            task = self._inflight.start(key, lambda: self._fetch_and_cache(cache, post_id, fetch))
+            if ctx is not None:
+                ctx.posts[key] = task
+        else:
+            self._request_hits += 1
+
+        return await self._inflight.join(task)
+
+    @staticmethod
+    async def _fetch_and_cache[T](
+        cache: TTLCache[str, Any], post_id: str, fetch: Callable[[], Coroutine[Any, Any, T]]
+    ) -> T:
+        post = await fetch()
+        # Failures aren't cached since they are often temporary
+        if post:
+            cache.set(post_id, post)
+        return post
+
     async def pixiv(self, url: str) -> PixivArtwork | None:
         artwork_id = self._extract_pixiv_id(url)
         if artwork_id is None:
             return None
-
-        headers = settings.pixiv_headers
-        api_url = f"https://www.pixiv.net/ajax/illust/{artwork_id}?lang=jp"
-
-        async with self.session.get(api_url, headers=headers, proxy=settings.proxy_url) as response:
+        return await self._fetch_once(
+            DomainId.PIXIV, artwork_id, lambda: self._fetch_pixiv(artwork_id)
+        )
+
+    async def _fetch_pixiv_body(self, artwork_id: str, path: str, name: str) -> Any | Missing:
+        """Return the body of a Pixiv ajax response, or MISSING if the request failed."""
+        api_url = f"{PIXIV_AJAX_URL}/{artwork_id}{path}"
+        logger.debug(f"Fetching Pixiv {name} from URL: {api_url}")
+
+        async with self.session.get(
+            api_url, headers=settings.pixiv_headers, proxy=settings.proxy_url
+        ) as response:
             if response.status != 200:
                 logger.warning(
-                    f"Failed to fetch Pixiv artwork info for ID {artwork_id}, status code: {response.status}"
+                    f"Failed to fetch Pixiv {name} for ID {artwork_id}, status code: {response.status}"
                 )
-                return None
+                return MISSING
+
+            return (await response.json()).get("body")
 
-            data = (await response.json()).get("body")
-            if data is None:
+    async def _fetch_pixiv(self, artwork_id: str) -> PixivArtwork | None:
+        pages_task = None
+        if self.speculative_pixiv_pages:
+            # Most artworks aren't ugoira, so request their pages alongside the artwork info
+            pages_task = asyncio.create_task(
+                self._fetch_pixiv_body(artwork_id, "/pages", "artwork pages")
+            )
+            # Retrieve the exception of a discarded request so it isn't logged as unhandled
+            pages_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        try:
+            data = await self._fetch_pixiv_body(artwork_id, "?lang=jp", "artwork info")
+            if data is MISSING or data is None:
                 return None
 
-        if data.get("illustType") == 2:
-            ugoira_url = f"https://www.pixiv.net/ajax/illust/{artwork_id}/ugoira_meta"
-            logger.debug(f"Fetching Pixiv ugoira meta from URL: {ugoira_url}")
-            async with self.session.get(
-                ugoira_url, headers=headers, proxy=settings.proxy_url
-            ) as response:
-                if response.status != 200:
-                    logger.warning(
-                        f"Failed to fetch Pixiv ugoira meta for ID {artwork_id}, status code: {response.status}"
-                    )
+            if data.get("illustType") == 2:
+                ugoira_body = await self._fetch_pixiv_body(
+                    artwork_id, "/ugoira_meta", "ugoira meta"
+                )
+                if ugoira_body is MISSING:
                     return None
-                ugoira_body = (await response.json()).get("body")
                 if ugoira_body:
                     data["ugoira_meta"] = ugoira_body
-        else:
-            pages_url = f"https://www.pixiv.net/ajax/illust/{artwork_id}/pages"
-            logger.debug(f"Fetching Pixiv artwork pages from URL: {pages_url}")
-            async with self.session.get(
-                pages_url, headers=headers, proxy=settings.proxy_url
-            ) as response:
-                if response.status != 200:
-                    logger.warning(
-                        f"Failed to fetch Pixiv artwork pages for ID {artwork_id}, status code: {response.status}"
-                    )
+            else:
+                pages_body = (
+                    await self._fetch_pixiv_body(artwork_id, "/pages", "artwork pages")
+                    if pages_task is None
+                    else await pages_task
+                )
+                if pages_body is MISSING:
                     return None
-                pages_data = (await response.json()).get("body", [])
                 data["image_proxy_urls"] = [
-                    page.get("urls", {}).get("original", "") for page in pages_data
+                    page.get("urls", {}).get("original", "") for page in pages_body or []
                 ]
                 logger.debug(f"Extracted image proxy URLs: {data['image_proxy_urls']}")
+        finally:
+            if pages_task is not None:
+                pages_task.cancel()
 
         return PixivArtwork(**data)
 
@@ -129,6 +225,20 @@ class PostInfoFetcher:
             return None
 
         handle, tweet_id = ids
+        tweet = await self._fetch_once(
+            DomainId.TWITTER, tweet_id, lambda: self._fetch_twitter(handle, tweet_id)
+        )
+        if tweet is None:
+            return None
+
+        media_index = self._extract_tweet_photo_index(url)
+        if media_index is not None and len(tweet.medias) > media_index:
+            # Copy so other links to the same tweet still get every media
+            tweet = tweet.model_copy(update={"medias": [tweet.medias[media_index]]})
+
+        return tweet
+
+    async def _fetch_twitter(self, handle: str, tweet_id: str) -> TwitterPost | None:
         api_url = f"https://api.fxtwitter.com/{handle}/status/{tweet_id}"
 
         logger.debug(f"Fetching Twitter post from URL: {api_url}")
@@ -143,14 +253,13 @@ class PostInfoFetcher:
         if tweet is None:
             return None
 
-        tweet = TwitterPost(**tweet)
-        media_index = self._extract_tweet_photo_index(url)
-        if media_index is not None and len(tweet.medias) > media_index:
-            tweet.medias = [tweet.medias[media_index]]
-
-        return tweet
+        return TwitterPost(**tweet)
 
     async def bluesky(self, url: str) -> BskyPost | None:
+        post_id = self._extract_bluesky_id(url) or url
+        return await self._fetch_once(DomainId.BLUESKY, post_id, lambda: self._fetch_bluesky(url))
+
+    async def _fetch_bluesky(self, url: str) -> BskyPost | None:
         api_url = replace_domain(url, "bsky.app", "bskx.app") + "/json"
         proxy_url = settings.proxy_url
 
@@ -171,6 +280,13 @@ class PostInfoFetcher:
         return BskyPost(**post)
 
     async def kemono(self, url: str) -> list[str]:
+        post_id = self._extract_kemono_id(url) or url
+        # Copied since callers may modify the list
+        return list(
+            await self._fetch_once(DomainId.KEMONO, post_id, lambda: self._fetch_kemono(url))
+        )
+
+    async def _fetch_kemono(self, url: str) -> list[str]:
         urls: list[str] = []
         api_url = replace_domain(url, "kemono.su", "kemono.su/api/v1")
 
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import io
 import re
+from dataclasses import dataclass
+from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Final
+from typing import TYPE_CHECKING, Any, Final, NamedTuple, Self
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 import sentry_sdk
@@ -14,7 +18,7 @@ from loguru import logger
 from embed_fixer.core.config import settings
 
 if TYPE_CHECKING:
-    from collections.abc import Coroutine
+    from collections.abc import Coroutine, Iterable, Iterator
 
 
 def remove_html_tags(input_string: str) -> str:
@@ -22,16 +26,55 @@ def remove_html_tags(input_string: str) -> str:
     return re.sub(r"<[^>]*>", "", input_string)
 
 
-def extract_urls(text: str) -> list[tuple[str, bool]]:
-    spoiler_pattern = r"\|\|(https?://[^\s|]+)\|\|"
-    regular_pattern = r"(?<!\$)(?<!<)(https?://[^\s>]+)(?!>)"
+URL_TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(
+    # The leading lookahead lets the regex engine skip ahead to candidate positions
+    r"(?=h)(?:"
+    r"(?<=\|\|)(?P<spoilered>https?://[^\s|]+)(?=\|\|)"
+    r"|(?<=<)(?P<suppressed>https?://[^\s>]+)(?=>)"
+    r"|(?<![$<])(?P<url>https?://[^\s>]+)"
+    r")"
+)
 
-    spoiler_urls = [(match, True) for match in re.findall(spoiler_pattern, text)]
 
-    text_without_spoilers = re.sub(spoiler_pattern, "", text)
-    regular_urls = [(match, False) for match in re.findall(regular_pattern, text_without_spoilers)]
+class URLSpan(NamedTuple):
+    url: str
+    start: int
+    end: int
+    spoilered: bool
+    """Wrapped in `||`, which `outer_start` and `outer_end` include."""
+    suppressed: bool
+    """Wrapped in `<>` to suppress the embed, which `outer_start` and `outer_end` include."""
 
-    return spoiler_urls + regular_urls
+    @property
+    def outer_start(self) -> int:
+        return self.start - (2 if self.spoilered else 1 if self.suppressed else 0)
+
+    @property
+    def outer_end(self) -> int:
+        return self.end + (2 if self.spoilered else 1 if self.suppressed else 0)
+
+
+def iter_url_spans(text: str) -> Iterator[URLSpan]:
+    """Yield every URL in `text` in a single pass, in the order they appear."""
+    for match in URL_TOKEN_PATTERN.finditer(text):
+        group = match.lastgroup
+        assert group is not None
+        start, end = match.span(group)
+        yield URLSpan(text[start:end], start, end, group == "spoilered", group == "suppressed")
+
+
+def replace_spans(text: str, replacements: Iterable[tuple[int, int, str]]) -> str:
+    """Replace `text[start:end]` with each replacement, building the result once.
+
+    Spans must not overlap.
+    """
+    parts: list[str] = []
+    pos = 0
+    for start, end, replacement in sorted(replacements, key=itemgetter(0)):
+        parts.extend((text[pos:start], replacement))
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
 
 
 def get_filesize(fp: io.BufferedIOBase) -> int:
@@ -46,46 +89,84 @@ def get_filesize(fp: io.BufferedIOBase) -> int:
 KEEP_QUERY_PARAMS: Final[dict[str, set[str]]] = {"youtube.com": {"v"}}
 
 
-def remove_query_params(url: str) -> str:
-    parsed_url = urlparse(url)
+@dataclass(frozen=True)
+class ParsedURL:
+    """An immutable URL, parsed once and turned back into text once by `str()`.
+
+    Transformations return new instances, so a URL can go through cleaning, matching and
+    fixing without being parsed again.
+    """
+
+    scheme: str
+    netloc: str
+    path: str
+    params: str = ""
+    query: str = ""
+    fragment: str = ""
 
-    query = ""
-    for domain, keep in KEEP_QUERY_PARAMS.items():
-        if domain_in_url(url, domain):
-            query = urlencode([(k, v) for k, v in parse_qsl(parsed_url.query) if k in keep])
-            break
+    @classmethod
+    def parse(cls, url: str) -> Self:
+        return cls(*urlparse(url))
 
-    return urlunparse(
-        (
-            parsed_url.scheme,
-            parsed_url.netloc,
-            parsed_url.path,
-            parsed_url.params,
-            query,
-            parsed_url.fragment,
+    def __str__(self) -> str:
+        return self._text
+
+    @cached_property
+    def _text(self) -> str:
+        return urlunparse(
+            (self.scheme, self.netloc, self.path, self.params, self.query, self.fragment)
         )
-    )
 
+    @cached_property
+    def host(self) -> str:
+        return self.netloc.lower()
 
-def domain_in_url(url: str, domain: str) -> bool:
-    parsed_url = urlparse(url)
-    return parsed_url.netloc == domain or parsed_url.netloc.endswith(f".{domain}")
+    @cached_property
+    def domain_suffixes(self) -> frozenset[str]:
+        """The host and each domain it belongs to, e.g. `vm.tiktok.com`, `tiktok.com`, `com`."""
+        labels = self.host.split(".")
+        return frozenset(".".join(labels[i:]) for i in range(len(labels)))
 
+    def is_on(self, domain: str) -> bool:
+        """Whether the URL's host is `domain` or one of its subdomains."""
+        return domain in self.domain_suffixes
 
-def replace_domain(url: str, old_domain: str, new_domain: str) -> str:
-    parsed_url = urlparse(url)
-    if domain_in_url(url, old_domain):
-        new_url = parsed_url._replace(netloc=new_domain)
-        return urlunparse(new_url)
+    def replace(self, **changes: str) -> Self:
+        return dataclasses.replace(self, **changes)
+
+    def without_tracking_params(self) -> Self:
+        """Drop the query, except for `KEEP_QUERY_PARAMS` of the URL's domain."""
+        query = ""
+        for domain, keep in KEEP_QUERY_PARAMS.items():
+            if self.is_on(domain):
+                query = urlencode([(k, v) for k, v in parse_qsl(self.query) if k in keep])
+                break
+        return self.replace(query=query)
+
+    def without_www(self) -> Self:
+        return self.replace(netloc=self.netloc.removeprefix("www."))
 
-    return url
+    def replace_domain(self, old_domain: str, new_domain: str) -> Self:
+        """Move the URL to `new_domain` if it's on `old_domain`.
 
+        `new_domain` may include a path, e.g. `kemono.su/api/v1`, which is prepended to
+        the URL's path.
+        """
+        if not self.is_on(old_domain):
+            return self
+        netloc, _, path_prefix = new_domain.partition("/")
+        path = f"/{path_prefix}{self.path}" if path_prefix else self.path
+        return self.replace(netloc=netloc, path=path)
 
-def append_path_to_url(url: str, path: str) -> str:
-    parsed_url = urlparse(url)
-    new_path = parsed_url.path.rstrip("/") + "/" + path.lstrip("/")
-    new_url = parsed_url._replace(path=new_path)
-    return urlunparse(new_url)
+    def append_path(self, path: str) -> Self:
+        return self.replace(path=self.path.rstrip("/") + "/" + path.lstrip("/"))
+
+
+def replace_domain(url: str, old_domain: str, new_domain: str) -> str:
+    parsed_url = ParsedURL.parse(url)
+    if not parsed_url.is_on(old_domain):
+        return url
+    return str(parsed_url.replace_domain(old_domain, new_domain))
 
 
 _tasks_set: set[asyncio.Task[Any] | asyncio.Future[Any]] = set()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Final
+from urllib.parse import urljoin
+
+import aiohttp
+import redis.asyncio as redis
+from loguru import logger
+
+from embed_fixer.core.config import settings
+from embed_fixer.utils.cache import MISSING, SingleFlight, TTLCache
+
+if TYPE_CHECKING:
+    from embed_fixer.utils.cache import CacheInfo
+
+SHORT_LINK_CACHE_SIZE: Final[int] = 10_000
+SHORT_LINK_CACHE_TTL: Final[int] = 60 * 60 * 24  # seconds
+SHORT_LINK_REDIS_TTL: Final[int] = 60 * 60 * 24 * 30  # seconds
+SHORT_LINK_FAILURE_TTL: Final[int] = 60 * 5  # seconds
+SHORT_LINK_MAX_REDIRECTS: Final[int] = 5
+SHORT_LINK_TIMEOUT: Final[float] = 5  # seconds
+REDIS_KEY_PREFIX: Final[str] = "embed_fixer:short_link:"
+REDIRECT_STATUSES: Final[frozenset[int]] = frozenset({301, 302, 303, 307, 308})
+
+
+class ShortLinkResolver:
+    """Expands share and short links to the canonical URL they redirect to.
+
+    Resolved links are cached in memory and, if a Redis URL is given, in Redis so they
+    survive restarts. Concurrent resolutions of the same link share a single request.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, *, redis_url: str | None = None) -> None:
+        self.session = session
+        self._redis = None if redis_url is None else redis.Redis.from_url(redis_url)
+        self._cache: TTLCache[str, str] = TTLCache(
+            maxsize=SHORT_LINK_CACHE_SIZE, ttl=SHORT_LINK_CACHE_TTL
+        )
+        self._failures: TTLCache[str, None] = TTLCache(
+            maxsize=SHORT_LINK_CACHE_SIZE, ttl=SHORT_LINK_FAILURE_TTL
+        )
+        self._inflight: SingleFlight[str, str | None] = SingleFlight()
+        self.requests = 0
+        """Number of short links resolved over the network."""
+
+    @property
+    def coalesced(self) -> int:
+        """Number of resolutions that joined an in-flight request for the same link."""
+        return self._inflight.coalesced
+
+    def info(self) -> CacheInfo:
+        return self._cache.info()
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def resolve(self, url: str) -> str | None:
+        """Return the URL that `url` redirects to, or None if it can't be resolved."""
+        cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+        if self._failures.get(url, MISSING) is not MISSING:
+            return None
+
+        return await self._inflight.run(url, lambda: self._resolve(url))
+
+    async def _resolve(self, url: str) -> str | None:
+        resolved = await self._redis_get(url)
+        if resolved is None:
+            resolved = await self._follow_redirects(url)
+            if resolved is None:
+                self._failures.set(url, None)
+                return None
+            await self._redis_set(url, resolved)
+
+        self._cache.set(url, resolved)
+        return resolved
+
+    async def _follow_redirects(self, url: str) -> str | None:
+        self.requests += 1
+        location = url
+        try:
+            for _ in range(SHORT_LINK_MAX_REDIRECTS):
+                async with self.session.get(
+                    location,
+                    allow_redirects=False,
+                    proxy=settings.proxy_url,
+                    timeout=aiohttp.ClientTimeout(total=SHORT_LINK_TIMEOUT),
+                ) as response:
+                    if response.status not in REDIRECT_STATUSES:
+                        break
+                    next_location = response.headers.get("Location")
+                    if next_location is None:
+                        break
+                    location = urljoin(location, next_location)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.warning(f"Failed to resolve short link {url}: {e!r}")
+            return None
+
+        if location == url:
+            logger.debug(f"Short link {url} did not redirect")
+            return None
+
+        logger.debug(f"Resolved short link {url} to {location}")
+        return location
+
+    async def _redis_get(self, url: str) -> str | None:
+        if self._redis is None:
+            return None
+        try:
+            value = await self._redis.get(f"{REDIS_KEY_PREFIX}{url}")
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read short link {url} from Redis: {e!r}")
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _redis_set(self, url: str, resolved: str) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(f"{REDIS_KEY_PREFIX}{url}", resolved, ex=SHORT_LINK_REDIS_TTL)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to write short link {url} to Redis: {e!r}")